@@ -0,0 +1,112 @@
+from airflow import DAG
+from airflow.models.param import Param
+from airflow.operators.python import PythonOperator
+from datetime import datetime
+import os
+import logging
+
+# Rutas (las mismas que el DAG de ingesta)
+BASE_FOLDER = "/opt/airflow/user_data"
+INDEX_LOG = os.path.join(BASE_FOLDER, "indexed_files.json")
+SNAPSHOT_FOLDER = os.path.join(BASE_FOLDER, "snapshots")
+DOCSTORE_FOLDER = os.environ.get("DOCSTORE_FOLDER", "/opt/airflow/docstore")
+
+QDRANT_URL = 'http://qdrant:6333'
+COLLECTION_NAME = 'airflow_ingestion'
+# Estado de la ingesta que viaja con el snapshot: así el DAG de ingesta no
+# vuelve a procesar los PDFs ya indexados en el nodo nuevo. Solo describe
+# COLLECTION_NAME, así que no se exporta ni restaura con otras colecciones.
+STATE_FILES = {"indexed_files.json": INDEX_LOG}
+
+def state_files_for(*collections):
+    return STATE_FILES if all(c == COLLECTION_NAME for c in collections) else None
+
+default_args = {
+    'owner': 'airflow',
+    'start_date': datetime(2025, 6, 1),
+    'retries': 0,
+}
+
+logger = logging.getLogger("airflow.task")
+
+# ------------------------ Tareas ------------------------
+
+def export_snapshot(params, **_):
+    """
+    Exporta la colección a ``SNAPSHOT_FOLDER/<colección>-<fecha>``. La fecha
+    es la de ejecución: en Airflow 3 los disparos manuales no tienen
+    ``logical_date`` (ni ``ts_nodash``) en el contexto.
+    """
+    from qdrant_client import QdrantClient
+
+    from streamlit_app.docstore import DocStore
+    from streamlit_app.snapshots import export_collection
+
+    collection = params["collection"]
+    output_dir = os.path.join(SNAPSHOT_FOLDER, f"{collection}-{datetime.now().strftime('%Y%m%dT%H%M%S')}")
+    qdrant = QdrantClient(url=QDRANT_URL, prefer_grpc=True)
+    manifest = export_collection(
+        qdrant, collection, output_dir, docstore=DocStore(DOCSTORE_FOLDER), state_files=state_files_for(collection)
+    )
+    logger.info(f"📦 Snapshot de {collection}: {manifest['points']} puntos en {output_dir}")
+    return output_dir
+
+def import_snapshot(params, **_):
+    """
+    Restaura un snapshot (carpeta dentro de ``SNAPSHOT_FOLDER`` o ruta absoluta).
+    """
+    from qdrant_client import QdrantClient
+
+    from streamlit_app.docstore import DocStore
+    from streamlit_app.snapshots import import_snapshot as restore, load_manifest
+
+    snapshot_dir = os.path.join(SNAPSHOT_FOLDER, params["snapshot"])
+    source = load_manifest(snapshot_dir)["collection"]
+    target = params["collection"] or source
+    qdrant = QdrantClient(url=QDRANT_URL, prefer_grpc=True)
+    result = restore(
+        qdrant,
+        snapshot_dir,
+        target,
+        docstore=DocStore(DOCSTORE_FOLDER),
+        state_files=state_files_for(source, target),
+        overwrite=params["overwrite"],
+    )
+    logger.info(f"📥 {result['points']} puntos importados en {result['collection']} ({result['seconds']:.1f} s)")
+    return result
+
+# ------------------------ DAGs ------------------------
+
+with DAG(
+    'export_collection_snapshot',
+    description='Exporta una colección de Qdrant (vectores, payload y estado de la ingesta) a shards Parquet',
+    default_args=default_args,
+    schedule=None,
+    catchup=False,
+    params={"collection": Param(COLLECTION_NAME, type="string")},
+    tags=['qdrant', 'snapshot'],
+) as export_dag:
+
+    PythonOperator(
+        task_id='export_collection',
+        python_callable=export_snapshot,
+    )
+
+with DAG(
+    'import_collection_snapshot',
+    description='Restaura un snapshot de colección sin recalcular embeddings',
+    default_args=default_args,
+    schedule=None,
+    catchup=False,
+    params={
+        "snapshot": Param("", type="string", description="Carpeta del snapshot en user_data/snapshots"),
+        "collection": Param("", type="string", description="Colección destino (vacío = la original)"),
+        "overwrite": Param(False, type="boolean"),
+    },
+    tags=['qdrant', 'snapshot'],
+) as import_dag:
+
+    PythonOperator(
+        task_id='import_collection',
+        python_callable=import_snapshot,
+    )
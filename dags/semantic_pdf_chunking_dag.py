@@ -3,29 +3,37 @@ from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
 import os
 import json
-import hashlib
-import requests
 import logging
 
-from langchain_community.document_loaders import PDFPlumberLoader
-from langchain_ollama import OllamaEmbeddings
-from langchain_experimental.text_splitter import SemanticChunker
-from langchain_qdrant import QdrantVectorStore, FastEmbedSparse, RetrievalMode
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, Filter, PointsSelector, FieldCondition, MatchValue
+# Solo módulos ligeros en el nivel superior: el scheduler ejecuta este
+# fichero en cada parseo. LangChain, FastEmbed, qdrant_client y requests
+# se importan dentro de las tareas.
+from streamlit_app.checkpoints import CheckpointStore
+from streamlit_app.chunk_pipeline import SPARSE_VECTOR_NAME, UPSERT_BATCH_SIZE, split_source, upsert_chunks
+from streamlit_app.compact_payload import PAYLOAD_MODE
+from streamlit_app.docstore import DOCSTORE_FOLDER, DocStore
+from streamlit_app.embedding_registry import resolve_collection_model
+from streamlit_app.ocr import ocr_empty_pages
+from streamlit_app.parent_child import INDEX_GRANULARITY
+from streamlit_app.pdf_files import compute_file_hash
+from streamlit_app.warmup import KEEP_ALIVE_SECONDS, ModelWarmup
 
 # Rutas
 BASE_FOLDER = "/opt/airflow/user_data"
 WATCH_FOLDER = os.path.join(BASE_FOLDER, "incoming")
 PROCESSED_FOLDER = os.path.join(BASE_FOLDER, "processed")
 INDEX_LOG = os.path.join(BASE_FOLDER, "indexed_files.json")
+METRICS_FOLDER = os.path.join(BASE_FOLDER, "metrics")
+CHECKPOINT_FOLDER = os.path.join(BASE_FOLDER, "checkpoints")
+OCR_CACHE_FOLDER = os.path.join(BASE_FOLDER, "ocr_cache")
 
 # Configuración de servicios
 QDRANT_URL = 'http://qdrant:6333'
 OLLAMA_URL = 'http://ollama:11434'
 COLLECTION_NAME = 'airflow_ingestion'
-EMBEDDING_MODEL_NAME = 'nomic-embed-text' # Cambia esto al modelo que estés usando
-EMBEDDING_MODEL_SIZE = 768  # Tamaño del modelo de embedding, ajusta según tu modelo
+# Modelo para crear la colección; si ya existe se usa el registrado en ella
+# (la dimensión se obtiene de Ollama)
+EMBEDDING_MODEL_NAME = 'nomic-embed-text'
 
 default_args = {
     'owner': 'airflow',
@@ -39,6 +47,8 @@ logger = logging.getLogger("airflow.task")
 # ------------------------ Funciones auxiliares ------------------------
 
 def check_service(url, name):
+    import requests
+
     try:
         logger.info(f"Verificando {name} en {url}")
         response = requests.get(url, timeout=2)
@@ -49,13 +59,6 @@ def check_service(url, name):
         logger.error(f"❌ Error conectando con {name}: {e}")
     return False
 
-def compute_file_hash(filepath):
-    sha256 = hashlib.sha256()
-    with open(filepath, 'rb') as f:
-        while chunk := f.read(8192):
-            sha256.update(chunk)
-    return sha256.hexdigest()
-
 def load_index_log():
     if os.path.exists(INDEX_LOG):
         with open(INDEX_LOG, 'r') as f:
@@ -66,7 +69,7 @@ def save_index_log(log):
     with open(INDEX_LOG, 'w') as f:
         json.dump(log, f, indent=2)
 
-def find_unindexed_pdfs():
+def find_unindexed_pdfs(metrics=None):
     os.makedirs(PROCESSED_FOLDER, exist_ok=True)
     index_log = load_index_log()
     unindexed = []
@@ -85,121 +88,200 @@ def find_unindexed_pdfs():
             index_log[filename]["hash"] != file_hash
         ):
             unindexed.append((filename, full_path, file_hash, file_mtime_iso))
+            if metrics:
+                metrics.cache_miss("index_log")
+        elif metrics:
+            metrics.cache_hit("index_log")
 
     return unindexed
 
 # ------------------------ Tarea principal ------------------------
 
 def process_and_index():
-    if not check_service(QDRANT_URL + "/collections", "Qdrant"):
-        raise Exception("Qdrant no disponible.")
-    if not check_service(OLLAMA_URL + "/api/tags", "Ollama"):
-        raise Exception("Ollama no disponible.")
-
-    unindexed_files = find_unindexed_pdfs()
+    """
+    Ejecuta la ingesta instrumentada. El informe de métricas se guarda en
+    METRICS_FOLDER (JSON + OpenMetrics) y se devuelve para que Airflow lo
+    adjunte a la tarea como XCom.
+    """
+    from streamlit_app.instrumentation import PipelineMetrics, profiled
+
+    metrics = PipelineMetrics("semantic_pdf_chunking", labels={"collection": COLLECTION_NAME})
+    try:
+        with profiled(METRICS_FOLDER, f"profile_{metrics.run_id}"):
+            _process_and_index(metrics)
+    finally:
+        paths = metrics.write(METRICS_FOLDER)
+        logger.info(f"📊 Métricas de la ejecución guardadas en {paths['json']}")
+    report = metrics.report()
+    logger.info(f"📊 Etapas (s): {report['stages']} | Rendimiento: {report['throughput']}")
+    return report
+
+def _process_and_index(metrics):
+    from langchain_community.document_loaders import PDFPlumberLoader
+    from langchain_experimental.text_splitter import SemanticChunker
+    from langchain_ollama import OllamaEmbeddings
+    from langchain_qdrant import FastEmbedSparse, QdrantVectorStore, RetrievalMode
+    from qdrant_client import QdrantClient
+
+    from streamlit_app.compact_payload import CompactQdrantVectorStore
+    from streamlit_app.instrumentation import TimedEmbeddings
+
+    with metrics.stage("service_check"):
+        if not check_service(QDRANT_URL + "/collections", "Qdrant"):
+            raise Exception("Qdrant no disponible.")
+        if not check_service(OLLAMA_URL + "/api/tags", "Ollama"):
+            raise Exception("Ollama no disponible.")
+
+    with metrics.stage("discovery"):
+        unindexed_files = find_unindexed_pdfs(metrics)
     if not unindexed_files:
         logger.info("No hay archivos nuevos o modificados para procesar.")
         return
 
     index_log = load_index_log()
-    all_documents = []
+    checkpoints = CheckpointStore(CHECKPOINT_FOLDER)
 
-    qdrant = QdrantClient(url=QDRANT_URL)
+    qdrant = QdrantClient(url=QDRANT_URL, prefer_grpc=True)
     
-    # Solo crea la colección si no existe
-    if not qdrant.collection_exists(COLLECTION_NAME):
-        logger.info(f"Creando {COLLECTION_NAME} en Qdrant.")
-        qdrant.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=EMBEDDING_MODEL_SIZE, distance=Distance.COSINE),
-            sparse_vectors_config={"bm25": {}}
+    # Crea la colección si no existe y obtiene el modelo registrado en ella
+    model_info = resolve_collection_model(qdrant, COLLECTION_NAME, EMBEDDING_MODEL_NAME, SPARSE_VECTOR_NAME,
+                                          INDEX_GRANULARITY, PAYLOAD_MODE)
+    logger.info(f"Coleccion {COLLECTION_NAME}: modelo {model_info['model']} ({model_info['dimension']} dimensiones), "
+                f"granularidad {model_info['granularity']}, payload {model_info['payload']}.")
+    metrics.labels["embedding_model"] = model_info["model"]
+    metrics.labels["granularity"] = model_info["granularity"]
+    metrics.labels["payload"] = model_info["payload"]
+    parent_child = model_info["granularity"] == "parent"
+    compact = model_info["payload"] == "compact"
+    # Textos de los chunks padre y de los chunks con payload compacto
+    docstore = DocStore(DOCSTORE_FOLDER) if parent_child or compact else None
+
+    # La carga del modelo en Ollama se solapa con la extracción del primer PDF
+    ModelWarmup(OLLAMA_URL).preload(embedding_model=model_info["model"])
+
+    embeddings = OllamaEmbeddings(model=model_info["model"], base_url=OLLAMA_URL, keep_alive=KEEP_ALIVE_SECONDS)
+    if not embeddings:
+        raise Exception("No se pudo inicializar OllamaEmbeddings.")
+    timed_embeddings = TimedEmbeddings(embeddings, metrics)
+    splitter = SemanticChunker(timed_embeddings)
 
-        )
-    else:
-        logger.info(f"Coleccion {COLLECTION_NAME} ya existe en Qdrant.")
+    sparse_model = FastEmbedSparse(model_name="Qdrant/bm25")
+
+    # La colección ya existe (se crea arriba con el vector disperso "bm25"):
+    # el vector store reutiliza el mismo cliente y solo añade los chunks.
+    vector_store = (CompactQdrantVectorStore if compact else QdrantVectorStore)(
+        client=qdrant,
+        collection_name=COLLECTION_NAME,
+        embedding=timed_embeddings,
+        sparse_embedding=sparse_model,
+        sparse_vector_name=SPARSE_VECTOR_NAME,
+        retrieval_mode=RetrievalMode.HYBRID,
+    )
 
+    # Cada fichero se procesa y se confirma por separado: si la tarea falla,
+    # el reintento retoma desde el último checkpoint.
     for filename, file_path, file_hash, file_mtime in unindexed_files:
         logger.info(f"📄 Procesando: {filename}")
 
-        # 🔥 Eliminar documentos anteriores del mismo archivo en Qdrant
-        logger.info(f"🧹 Eliminando chunks anteriores de {filename} en Qdrant...")
-        try:
+        state = checkpoints.load(file_hash)
+        if state:
+            metrics.cache_hit("checkpoint")
+            logger.info(f"♻️  Reanudando {filename}: {state['upserted']}/{state['chunk_count']} chunks ya indexados")
+            chunks, ids = checkpoints.load_chunks(file_hash)
+        else:
+            metrics.cache_miss("checkpoint")
+            delete_stale_chunks(qdrant, filename, file_hash, metrics)
+
+            try:
+                with metrics.stage("extraction"):
+                    loader = PDFPlumberLoader(file_path)
+                    docs = loader.load()
+                metrics.add("files")
+                metrics.add("bytes", os.path.getsize(file_path))
+                metrics.add("pages", len(docs))
+
+                # Páginas escaneadas (sin capa de texto): OCR solo de esas páginas
+                with metrics.stage("ocr"):
+                    ocr_empty_pages(file_path, docs, cache_dir=OCR_CACHE_FOLDER, metrics=metrics)
+            except Exception as e:
+                logger.error(f"Error procesando {filename}: {e}")
+                continue
+
+            docs = [doc for doc in docs if doc.page_content.strip()]
+            if not docs:
+                # Se queda en incoming sin indexar; se registra con su hash para
+                # no volver a extraerlo (ni pasarlo por OCR) hasta que cambie
+                logger.warning(f"{filename} está vacío o no tiene texto válido (ni siquiera con OCR).")
+                index_log[filename] = {
+                    "hash": file_hash,
+                    "last_modified": file_mtime,
+                    "status": "empty",
+                }
+                save_index_log(index_log)
+                continue
+            for doc in docs:
+                doc.metadata["source"] = filename  # necesario para la eliminación posterior
+
+            with metrics.stage("semantic_chunking"):
+                chunks, ids = split_source(splitter, docs, file_hash, COLLECTION_NAME, parent_child, docstore)
+            metrics.add("chunks", len(chunks))
+            state = checkpoints.save_chunks(file_hash, filename, chunks, ids)
+            logger.info(f"✅ {filename}: {len(chunks)} chunks calculados")
+
+        # Se guarda el progreso tras cada lote; con payload compacto el texto
+        # va al docstore antes que los puntos a Qdrant (también al reanudar)
+        upsert_chunks(
+            qdrant, vector_store, COLLECTION_NAME, chunks, ids, metrics,
+            start=state["upserted"], batch_size=UPSERT_BATCH_SIZE,
+            text_docstore=docstore if compact else None,
+            on_batch=lambda upserted: checkpoints.mark_upserted(state, upserted),
+        )
+        logger.info(f"✅ {filename}: índice vectorial actualizado")
+
+        index_log[filename] = {
+            "hash": file_hash,
+            "last_modified": file_mtime
+        }
+        save_index_log(index_log)
+
+        dest = os.path.join(PROCESSED_FOLDER, filename)
+        os.rename(file_path, dest)
+        checkpoints.clear(file_hash)
+        logger.info(f"✅ Procesado y movido: {dest}")
+
+def delete_stale_chunks(qdrant, filename, file_hash, metrics):
+    """
+    Elimina de Qdrant los chunks de versiones anteriores del fichero. Los de
+    la versión actual (mismo hash) se conservan: tienen IDs deterministas y
+    el upsert los sobrescribe sin duplicarlos.
+    """
+    from qdrant_client.http.models import FieldCondition, Filter, FilterSelector, MatchValue
+
+    logger.info(f"🧹 Eliminando chunks anteriores de {filename} en Qdrant...")
+    try:
+        with metrics.stage("delete_previous"):
             qdrant.delete(
                 collection_name=COLLECTION_NAME,
-                points_selector=PointsSelector.filter(
+                points_selector=FilterSelector(
                     filter=Filter(
                         must=[
                             FieldCondition(
-                                key="source",
+                                key="metadata.source",
                                 match=MatchValue(value=filename)
                             )
+                        ],
+                        must_not=[
+                            FieldCondition(
+                                key="metadata.file_hash",
+                                match=MatchValue(value=file_hash)
+                            )
                         ]
                     )
                 )
             )
-            logger.info(f"🗑️  Eliminación completada para {filename}")
-        except Exception as e:
-            logger.warning(f"⚠️ No se pudo eliminar {filename}: {e}")
-
-        try:
-            loader = PDFPlumberLoader(file_path)
-            docs = loader.load()
-            if docs:
-                for doc in docs:
-                    doc.metadata["source"] = filename  # necesario para la eliminación posterior
-                all_documents.extend(docs)
-                index_log[filename] = {
-                    "hash": file_hash,
-                    "last_modified": file_mtime
-                }
-            else:
-                logger.warning(f"{filename} está vacío o no tiene texto válido.")
-        except Exception as e:
-            logger.error(f"Error procesando {filename}: {e}")
-
-    if not all_documents:
-        logger.warning("Ningún documento válido encontrado.")
-        return
-
-    embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL_NAME)
-    if not embeddings:
-        raise Exception("No se pudo inicializar OllamaEmbeddings.")
-
-    splitter = SemanticChunker(embeddings)
-    logger.info("✅ 1/3 Chunking completado")
-
-    chunks = splitter.split_documents(all_documents)
-    logger.info("✅ 2/3 División completada")
-
-    # Verifica si la colección existe y si está vacía
-    recreate_collection = False
-    if not qdrant.collection_exists(COLLECTION_NAME):
-        recreate_collection = True
-    else:
-        stats = qdrant.get_collection(COLLECTION_NAME).get("points_count", 0)
-        if stats == 0:
-            recreate_collection = True
-
-    sparse_model = FastEmbedSparse(model_name="Qdrant/bm25")
-
-    QdrantVectorStore.from_documents(
-        chunks,
-        embedding=embeddings,
-        sparse_embedding=sparse_model,
-        location=QDRANT_URL,
-        prefer_grpc=True,
-        collection_name=COLLECTION_NAME,
-        retrieval_mode=RetrievalMode.HYBRID,
-        force_recreate=recreate_collection,  # recrear la colección en el primer ciclo
-    )
-    logger.info("✅ 3/3 Índice vectorial creado")
-
-    save_index_log(index_log)
-
-    for filename, file_path, _, _ in unindexed_files:
-        dest = os.path.join(PROCESSED_FOLDER, filename)
-        os.rename(file_path, dest)
-        logger.info(f"✅ Procesado y movido: {dest}")
+        logger.info(f"🗑️  Eliminación completada para {filename}")
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo eliminar {filename}: {e}")
 
 # ------------------------ DAG ------------------------
 
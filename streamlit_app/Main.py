@@ -9,8 +9,6 @@ def main():
         st.session_state.embedding_model = ""
     if "selected_db" not in st.session_state:
         st.session_state.selected_db = ""
-    if "embedding_dim" not in st.session_state:
-        st.session_state.embedding_dim = ""
     if "temp" not in st.session_state:
         st.session_state.temp = 0.7
     if "top_k" not in st.session_state:
@@ -23,8 +21,6 @@ def main():
     # Initialize chat history
     if "rag_messages" not in st.session_state:
         st.session_state.rag_messages = []
-    if "embedding_dim" not in st.session_state:
-        st.session_state.embedding_dim = 1024
 
     st.set_page_config(
     page_title="streamlit-ollama",
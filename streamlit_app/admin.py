@@ -0,0 +1,98 @@
+"""
+Administración de modelos de Ollama y colecciones de Qdrant (página Ajustes).
+"""
+import streamlit as st
+import requests
+
+from streamlit_app.connections import check_connection
+from streamlit_app.docstore import default_docstore
+from streamlit_app.embedding_registry import create_collection, list_collections, unregister_collection
+from streamlit_app.chunk_pipeline import SPARSE_VECTOR_NAME
+
+def ollama_pull_model(model_name: str):
+    """
+    Descarga un modelo de Ollama.
+    Lanza excepción si falla.
+    """
+    import ollama
+
+    try:
+        with st.spinner(f"Descargando modelo '{model_name}'...", show_time=True):
+            ollama.pull(model_name)
+        st.success(f"Modelo '{model_name}' descargado con éxito.")
+    except Exception as e:
+        st.error(f"No se pudo descargar el modelo '{model_name}': {e}")
+
+def ollama_delete_model(url, container_name: str):
+    """
+    Elimina un modelo de Ollama.
+    Devuelve True si se eliminó correctamente, False en caso contrario.
+    """
+    if not check_connection(url, container_name):
+        return
+    import ollama
+
+    try:
+        modelos = ollama.list()["models"]
+        if modelos:
+            selected_model = st.selectbox("Selecciona el modelo a eliminar:", [model["model"] for model in modelos], key="delete_model")
+            if st.button("Eliminar modelo", key="delete_model_button"):
+                ollama.delete(model=selected_model)
+                st.success(f"Modelo '{selected_model}' eliminado con éxito.")
+        else:
+            st.info("No hay modelos disponibles para eliminar.")
+    except Exception as e:
+        st.error(f"Error al eliminar modelo: {e}")
+
+def ollama_model_info(url, model_name):
+    """
+    Devuelve la informacion de un modelo de Ollama.
+    Lanza excepción si falla.
+    """
+    try:
+        res = requests.post(f"{url}/api/show", json={"name": model_name})
+        res.raise_for_status()
+        return res.json()
+    except requests.exceptions.RequestException as e:
+        return {"error": f"No se pudo obtener la información: {e}"}
+
+def qdrant_create_db(db_name, embedding_model, client, granularity: str = "chunk", payload: str = "full"):
+    """
+    Crea una nueva colección en Qdrant para ``embedding_model``: la dimensión
+    se obtiene de Ollama y el modelo, la granularidad y el modo de payload
+    quedan registrados en la colección.
+    Lanza excepción si falla.
+    """
+    # Crea la coleccion en Qdrant
+    create_collection(client, db_name, embedding_model, sparse_vector_name=SPARSE_VECTOR_NAME,
+                      granularity=granularity, payload=payload)
+    # Verifica que se ha creado la colección
+    if client.collection_exists(db_name):
+        st.success(f"Colección '{db_name}' creada correctamente.")
+    else:
+        st.error(f"No se pudo crear la colección '{db_name}'.")
+
+def qdrant_delete_db(url, container_name: str):
+    """
+    Elimina una colección de Qdrant.
+    Lanza excepción si falla.
+    """
+    if not check_connection(url, container_name):
+        return
+    from qdrant_client import QdrantClient
+
+    try:
+        client = QdrantClient(url=url)
+        existing_collections = list_collections(client)
+
+        if existing_collections:
+            selected_collection = st.selectbox("Selecciona la colección a eliminar:", existing_collections, key="delete_collection")
+            if st.button("Eliminar colección", key="delete_collection_button"):
+                client.delete_collection(collection_name=selected_collection)
+                unregister_collection(client, selected_collection)
+                default_docstore().drop_collection(selected_collection)
+                st.success(f"Colección '{selected_collection}' eliminada con éxito.")
+        else:
+            st.info("No hay colecciones disponibles para eliminar.")
+    except Exception as e:
+        st.error(f"Error al eliminar colección: {e}")
@@ -0,0 +1,102 @@
+"""
+Puntos de control por fichero para ingestas reanudables.
+
+Para cada fichero (identificado por su hash) se guardan:
+
+- ``<hash>.json``: estado (``chunked`` y nº de chunks ya subidos a Qdrant).
+- ``<hash>.chunks.jsonl``: los chunks ya calculados con sus IDs, para no
+  repetir el chunking semántico (que también consume embeddings).
+
+Las escrituras son atómicas (fichero temporal + ``os.replace``).
+"""
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class CheckpointStore:
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _state_path(self, file_hash: str) -> str:
+        return os.path.join(self.folder, f"{file_hash}.json")
+
+    def _chunks_path(self, file_hash: str) -> str:
+        return os.path.join(self.folder, f"{file_hash}.chunks.jsonl")
+
+    def _write_atomic(self, path: str, write) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _save_state(self, state: Dict) -> None:
+        state["updated_at"] = datetime.now().isoformat()
+        self._write_atomic(self._state_path(state["file_hash"]), lambda f: json.dump(state, f, indent=2))
+
+    # ------------------------ Lectura ------------------------
+
+    def load(self, file_hash: str) -> Optional[Dict]:
+        """
+        Devuelve el estado guardado del fichero o None si no hay checkpoint.
+        """
+        path = self._state_path(file_hash)
+        if not os.path.exists(path) or not os.path.exists(self._chunks_path(file_hash)):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load_chunks(self, file_hash: str) -> Tuple[List, List[str]]:
+        """
+        Devuelve (documents, ids) de los chunks guardados.
+        """
+        from langchain_core.documents import Document
+
+        documents, ids = [], []
+        with open(self._chunks_path(file_hash), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                documents.append(Document(page_content=record["page_content"], metadata=record["metadata"]))
+                ids.append(record["id"])
+        return documents, ids
+
+    # ------------------------ Escritura ------------------------
+
+    def save_chunks(self, file_hash: str, filename: str, chunks, ids: List[str]) -> Dict:
+        """
+        Guarda los chunks calculados de un fichero y marca el estado ``chunked``.
+        """
+        def write(f):
+            for cid, chunk in zip(ids, chunks):
+                f.write(json.dumps({"id": cid, "page_content": chunk.page_content, "metadata": chunk.metadata}, default=str))
+                f.write("\n")
+
+        self._write_atomic(self._chunks_path(file_hash), write)
+        state = {
+            "file_hash": file_hash,
+            "filename": filename,
+            "stage": "chunked",
+            "chunk_count": len(ids),
+            "upserted": 0,
+        }
+        self._save_state(state)
+        return state
+
+    def mark_upserted(self, state: Dict, upserted: int) -> None:
+        """
+        Registra cuántos chunks (en orden) están ya en Qdrant.
+        """
+        state["upserted"] = upserted
+        if upserted >= state["chunk_count"]:
+            state["stage"] = "upserted"
+        self._save_state(state)
+
+    def clear(self, file_hash: str) -> None:
+        for path in (self._state_path(file_hash), self._chunks_path(file_hash)):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,40 @@
+"""
+Identificadores deterministas de chunks.
+
+El ID de un punto en Qdrant se deriva de (hash del fichero, ordinal del
+chunk, hash del contenido): reindexar el mismo fichero produce los mismos
+IDs, de modo que los upserts son idempotentes y un reintento no deja
+duplicados huérfanos en la colección.
+"""
+import hashlib
+import uuid
+from typing import List
+
+# Espacio de nombres fijo para uuid5; no cambiarlo o cambiarán todos los IDs
+CHUNK_NAMESPACE = uuid.UUID("6f0e7a8e-3b53-5c1e-9d55-2a4f0c3e8b11")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source_hash: str, ordinal: int, content: str) -> str:
+    """
+    Devuelve el UUID (como string, formato aceptado por Qdrant) de un chunk.
+    """
+    return str(uuid.uuid5(CHUNK_NAMESPACE, f"{source_hash}:{ordinal}:{content_hash(content)}"))
+
+
+def assign_chunk_ids(chunks, source_hash: str) -> List[str]:
+    """
+    Asigna IDs deterministas a una lista de Documents de un mismo fichero,
+    en orden, y los guarda también en sus metadatos. Devuelve la lista de IDs.
+    """
+    ids = []
+    for ordinal, chunk in enumerate(chunks):
+        cid = chunk_id(source_hash, ordinal, chunk.page_content)
+        chunk.metadata["file_hash"] = source_hash
+        chunk.metadata["chunk_ordinal"] = ordinal
+        chunk.metadata["chunk_id"] = cid
+        ids.append(cid)
+    return ids
@@ -0,0 +1,68 @@
+"""
+Etapas de indexación comunes al DAG de ingesta y a la app.
+
+Del texto de una fuente a los puntos en Qdrant: chunking semántico, IDs
+deterministas, padre/hijo, texto del payload compacto y upsert por lotes
+sin recalcular los embeddings de los chunks que ya están en la colección.
+Así las colecciones del DAG y de la app tienen los mismos metadatos (p. ej.
+``source_chunks``, que usa ``qdrant_source_indexed``).
+"""
+from typing import Callable, List, Optional, Tuple
+
+from streamlit_app.chunk_ids import assign_chunk_ids
+from streamlit_app.compact_payload import store_texts
+from streamlit_app.parent_child import split_children, store_parents
+
+# Chunks por lote de embeddings + upsert (y por checkpoint en el DAG)
+UPSERT_BATCH_SIZE = 64
+# Nombre del vector disperso (BM25) de las colecciones
+SPARSE_VECTOR_NAME = "bm25"
+
+
+def split_source(splitter, docs, file_hash: str, collection: str, parent_child: bool = False,
+                 docstore=None) -> Tuple[List, List[str]]:
+    """
+    Divide las páginas de una fuente en chunks con IDs deterministas.
+    Con ``parent_child`` guarda los padres en ``docstore`` y devuelve los
+    hijos. Cada chunk lleva en ``source_chunks`` el total de su fuente.
+    """
+    chunks = splitter.split_documents(docs)
+    ids = assign_chunk_ids(chunks, file_hash)
+    if parent_child:
+        # Los padres van al docstore; en Qdrant solo se indexan los hijos
+        store_parents(docstore, collection, chunks, ids)
+        chunks, ids = split_children(chunks, ids)
+    for chunk in chunks:
+        chunk.metadata["source_chunks"] = len(chunks)
+    return chunks, ids
+
+
+def upsert_chunks(client, vector_store, collection: str, chunks, ids: List[str], metrics, start: int = 0,
+                  batch_size: int = UPSERT_BATCH_SIZE, text_docstore=None,
+                  on_batch: Optional[Callable[[int], None]] = None) -> None:
+    """
+    Sube los chunks desde ``start`` en lotes de ``batch_size``. Antes de cada
+    lote consulta qué IDs ya están en Qdrant para no volver a calcular sus
+    embeddings. Con ``text_docstore`` (payload compacto) el texto se guarda
+    antes de subir los puntos. ``on_batch(subidos)`` se llama tras cada lote.
+    """
+    if text_docstore is not None:
+        store_texts(text_docstore, collection, chunks, ids)
+    for offset in range(start, len(chunks), batch_size):
+        batch_ids = ids[offset:offset + batch_size]
+        batch = chunks[offset:offset + batch_size]
+
+        existing = {
+            str(point.id)
+            for point in client.retrieve(collection, ids=batch_ids, with_payload=False, with_vectors=False)
+        }
+        pending = [(cid, doc) for cid, doc in zip(batch_ids, batch) if cid not in existing]
+        metrics.cache_hit("qdrant_points", len(existing))
+        metrics.cache_miss("qdrant_points", len(pending))
+
+        if pending:
+            with metrics.stage("embed_and_upsert"):
+                vector_store.add_documents([doc for _, doc in pending], ids=[cid for cid, _ in pending])
+            metrics.add("vectors", len(pending))
+        if on_batch:
+            on_batch(offset + len(batch))
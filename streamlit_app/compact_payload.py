@@ -0,0 +1,92 @@
+"""
+Payload compacto: el texto de los chunks fuera de Qdrant.
+
+Con el payload completo cada punto guarda ``page_content`` y todos los
+metadatos de LangChain, así que la RAM de Qdrant, los snapshots y las
+respuestas de búsqueda están dominados por texto que solo se usa para los
+resultados finales. En las colecciones con payload compacto el texto se
+guarda en el ``DocStore`` (segmentos zstd, tipo ``TEXT_KIND``) y en Qdrant
+solo quedan los campos de ``PAYLOAD_FIELDS`` (IDs y campos de filtrado).
+Al recuperar, el texto se carga solo para los hits finales.
+
+``CompactQdrantVectorStore`` se define al pedirlo (``langchain_qdrant`` es
+una importación pesada que no necesita quien solo lee o escribe textos).
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Modo de payload de una colección: "full" (texto y metadatos en Qdrant) o "compact"
+PAYLOAD_MODES = ("full", "compact")
+PAYLOAD_MODE = os.environ.get("PAYLOAD_MODE", "full")
+# Metadatos que se mantienen en Qdrant con el payload compacto
+PAYLOAD_FIELDS = (
+    "source", "page", "file_hash", "chunk_id", "chunk_ordinal",
+    "source_chunks", "parent_id", "child_ordinal",
+)
+# Tipo de segmento del DocStore con el texto de los chunks
+TEXT_KIND = "text"
+
+
+def compact_metadata(metadata: Optional[Dict]) -> Dict:
+    return {key: value for key, value in (metadata or {}).items() if key in PAYLOAD_FIELDS}
+
+
+_vector_store_class = None
+
+
+def _compact_vector_store_class():
+    global _vector_store_class
+    if _vector_store_class is None:
+        from langchain_qdrant import QdrantVectorStore
+
+        class CompactQdrantVectorStore(QdrantVectorStore):
+            """
+            ``QdrantVectorStore`` que sube puntos sin ``page_content`` y con
+            los metadatos reducidos a ``PAYLOAD_FIELDS``.
+            """
+
+            def _build_payloads(self, texts, metadatas, content_payload_key, metadata_payload_key):
+                payloads = super()._build_payloads(texts, metadatas, content_payload_key, metadata_payload_key)
+                return [{metadata_payload_key: compact_metadata(payload[metadata_payload_key])} for payload in payloads]
+
+        _vector_store_class = CompactQdrantVectorStore
+    return _vector_store_class
+
+
+def __getattr__(name: str):
+    if name == "CompactQdrantVectorStore":
+        return _compact_vector_store_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def store_texts(docstore, collection: str, chunks, ids: List[str]) -> None:
+    """
+    Guarda el texto de los chunks en el ``DocStore``, un segmento por fuente
+    (reemplaza el de la versión anterior de la fuente).
+    """
+    by_source: Dict[str, Dict[str, str]] = {}
+    for chunk, cid in zip(chunks, ids):
+        by_source.setdefault(chunk.metadata.get("source", ""), {})[cid] = chunk.page_content
+    for source, texts in by_source.items():
+        docstore.write_source(collection, source, texts, kind=TEXT_KIND)
+
+
+def hydrate_hits(hits, docstore) -> List:
+    """
+    Rellena el texto de los hits (``FederatedHit``) que llegan sin contenido
+    desde colecciones con payload compacto. Los demás no se tocan.
+    """
+    wanted: Dict[Tuple[str, str], set] = {}
+    for hit in hits:
+        if not hit.content:
+            key = (hit.collection, hit.metadata.get("source", ""))
+            wanted.setdefault(key, set()).add(hit.metadata.get("chunk_id") or hit.id)
+    if not wanted:
+        return hits
+    texts = {key: docstore.get(key[0], key[1], ids, kind=TEXT_KIND) for key, ids in wanted.items()}
+    for hit in hits:
+        if not hit.content:
+            hit.content = texts.get((hit.collection, hit.metadata.get("source", "")), {}).get(
+                hit.metadata.get("chunk_id") or hit.id, ""
+            )
+    return hits
@@ -0,0 +1,99 @@
+"""
+Conexiones y chequeos de los servicios (Ollama y Qdrant) desde las páginas.
+
+Los clientes pesados (``ollama``, ``qdrant_client``) se importan dentro de
+cada función: importar este módulo solo carga Streamlit y ``requests``.
+"""
+import streamlit as st
+import requests
+from typing import Optional
+
+from streamlit_app.embedding_registry import list_collections
+from streamlit_app.warmup import ModelWarmup
+
+def check_connection(url, container_name: str):
+    """
+    Comprueba la conexión HTTP con un contenedor.
+    Devuelve True si la conexión es exitosa, False en caso contrario.
+    """
+    session_key = f"{container_name}_connection_ok"
+    if st.session_state.get(session_key, False):
+        return True
+    try:
+        response = requests.get(url, timeout=(1, 2))
+        if response.status_code == 200:
+            st.success(f"✅ Conexión exitosa con {container_name}.")
+            st.session_state[session_key] = True
+            return True
+        else:
+            st.error(f"⚠️ El contenedor de {container_name} respondió con código {response.status_code}.")
+            return False
+    except requests.exceptions.ConnectTimeout:
+        st.error(f"⏱️ Tiempo de espera agotado al conectar con {container_name}.")
+        return False
+    except requests.exceptions.ReadTimeout:
+        st.error(f"⏱️ Tiempo de espera agotado esperando respuesta de {container_name}.")
+        return False
+    except requests.exceptions.ConnectionError:
+        st.error(f"❌ No se pudo establecer conexión con {container_name}. Asegúrate de que esté en ejecución.")
+        return False
+    except Exception as e:
+        st.error(f"⚠️ Error inesperado al conectar con {container_name}: {e}")
+        return False
+
+def ollama_check_model(url, container_name: str):
+    """
+    Devuelve una lista de nombres de modelos disponibles en Ollama.
+    Lanza excepción si no hay conexión.
+    """
+    if not check_connection(url, container_name):
+        return
+    import ollama
+
+    try:
+        modelos = ollama.list()["models"]
+        if modelos:
+            st.sidebar.selectbox("Modelos disponibles:", [model["model"] for model in modelos], key="selected_model")
+        else:
+            st.warning("No hay modelo disponible. Descarga uno.")
+    except Exception as e:
+        st.error(f"Error al obtener modelos de Ollama: {e}")
+
+@st.cache_resource
+def get_model_warmup() -> ModelWarmup:
+    """
+    Gestor de precarga compartido por todas las sesiones del proceso.
+    """
+    return ModelWarmup()
+
+def ollama_warmup(embedding_model: Optional[str] = None, chat_model: Optional[str] = None) -> ModelWarmup:
+    """
+    Precarga en segundo plano los modelos de la página (no bloquea) y
+    los marca como usados. Devuelve el gestor de precarga.
+    """
+    warmup = get_model_warmup()
+    try:
+        warmup.preload(embedding_model=embedding_model, chat_model=chat_model)
+        for model in (embedding_model, chat_model):
+            if model:
+                warmup.touch(model)
+    except Exception as e:
+        st.warning(f"No se pudieron precargar los modelos: {e}")
+    return warmup
+
+def qdrant_check_db(url, container_name: str):
+    if not check_connection(url, container_name):
+        return None
+    from qdrant_client import QdrantClient
+
+    try:
+        client = QdrantClient(url=url)
+        existing_collections = list_collections(client)
+        if existing_collections:
+            st.sidebar.selectbox("Colecciones disponibles:", existing_collections, key="selected_db")
+        else:
+            st.warning("No hay colecciones existentes. Crea una nueva.")
+        return client
+    except Exception as e:
+        st.error(f"Error al conectar con Qdrant: {e}")
+        return None
@@ -0,0 +1,235 @@
+"""
+Almacén local de textos indexados por ID de chunk.
+
+Los textos de cada fuente de una colección se guardan en un segmento
+inmutable: ``<colección>/<hash de la fuente>.seg`` para los chunks padre y
+``<colección>/<tipo>/<hash de la fuente>.seg`` para otros tipos (p. ej. el
+texto de los chunks con payload compacto). Un segmento tiene una cabecera
+con la longitud del índice, el índice JSON y los textos UTF-8 agrupados en
+bloques de ``DOCSTORE_BLOCK_SIZE`` bytes, comprimidos con zstd si
+``zstandard`` está instalado. Reindexar una fuente reemplaza su segmento de
+forma atómica, así que no hay bloqueos entre el DAG y la app. La lectura
+usa ``mmap`` y solo descomprime los bloques de los textos pedidos.
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Carpeta compartida por la app y el DAG
+DOCSTORE_FOLDER = os.environ.get("DOCSTORE_FOLDER", os.path.join(os.path.expanduser("~"), ".pdf_indexer", "docstore"))
+# Tamaño de bloque (sin comprimir) y nivel de zstd
+DOCSTORE_BLOCK_SIZE = int(os.environ.get("DOCSTORE_BLOCK_SIZE", str(64 * 1024)))
+DOCSTORE_ZSTD_LEVEL = int(os.environ.get("DOCSTORE_ZSTD_LEVEL", "3"))
+# Bloques descomprimidos en caché por segmento
+BLOCK_CACHE_SIZE = 32
+# Segmentos mapeados a la vez por ``DocStore`` (cada uno ocupa un descriptor)
+DOCSTORE_MAX_OPEN_SEGMENTS = int(os.environ.get("DOCSTORE_MAX_OPEN_SEGMENTS", "128"))
+
+# Cabecera del segmento: longitud del índice JSON (uint64)
+_HEADER = struct.Struct("<Q")
+
+
+def default_codec() -> str:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "none"
+    return "zstd"
+
+
+class _Segment:
+
+    def __init__(self, path: str):
+        # El mapeo sigue siendo válido al cerrar el fichero
+        with open(path, "rb") as f:
+            try:
+                # Python >= 3.13: el mmap no duplica el descriptor
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ, trackfd=False)
+            except TypeError:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (index_length,) = _HEADER.unpack_from(self._mmap, 0)
+        self._data_offset = _HEADER.size + index_length
+        header = json.loads(self._mmap[_HEADER.size:self._data_offset])
+        self.source = header["source"]
+        # Los segmentos sin bloques (anteriores a la compresión) guardan
+        # ID -> (desplazamiento, longitud) sobre los datos
+        self.codec = header.get("codec", "none")
+        self.blocks: List[Tuple[int, int]] = [tuple(b) for b in header.get("blocks", [])]
+        self.index: Dict[str, Tuple[int, ...]] = {k: tuple(v) for k, v in header["index"].items()}
+        self._decompressor = None
+        if self.codec == "zstd":
+            import zstandard
+
+            self._decompressor = zstandard.ZstdDecompressor()
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _block(self, number: int) -> bytes:
+        with self._lock:
+            if number in self._cache:
+                self._cache.move_to_end(number)
+                return self._cache[number]
+            offset, length = self.blocks[number]
+            start = self._data_offset + offset
+            data = self._mmap[start:start + length]
+            if self._decompressor is not None:
+                data = self._decompressor.decompress(data)
+            self._cache[number] = data
+            if len(self._cache) > BLOCK_CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return data
+
+    def read(self, chunk_id: str) -> Optional[str]:
+        entry = self.index.get(chunk_id)
+        if entry is None:
+            return None
+        if len(entry) == 2:
+            start = self._data_offset + entry[0]
+            return self._mmap[start:start + entry[1]].decode("utf-8")
+        number, offset, length = entry
+        return self._block(number)[offset:offset + length].decode("utf-8")
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+class DocStore:
+
+    def __init__(self, folder: str = DOCSTORE_FOLDER, codec: Optional[str] = None,
+                 block_size: int = DOCSTORE_BLOCK_SIZE, level: int = DOCSTORE_ZSTD_LEVEL,
+                 max_open_segments: int = DOCSTORE_MAX_OPEN_SEGMENTS):
+        self.folder = folder
+        self.codec = codec or default_codec()
+        self.block_size = block_size
+        self.level = level
+        self.max_open_segments = max_open_segments
+        # ruta -> ((inodo, mtime_ns), segmento abierto), en orden LRU
+        self._segments: "OrderedDict[str, Tuple[Tuple[int, int], _Segment]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, collection: str, source: str, kind: str = "parents") -> str:
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+        if kind == "parents":
+            return os.path.join(self.folder, collection, f"{key}.seg")
+        return os.path.join(self.folder, collection, kind, f"{key}.seg")
+
+    # ------------------------ Escritura ------------------------
+
+    def _blocks(self, texts: Dict[str, str]):
+        """
+        Agrupa los textos en bloques: devuelve (índice, bloques sin comprimir).
+        """
+        index, blocks, current = {}, [], bytearray()
+        for chunk_id, text in texts.items():
+            data = text.encode("utf-8")
+            if current and len(current) + len(data) > self.block_size:
+                blocks.append(bytes(current))
+                current = bytearray()
+            index[chunk_id] = (len(blocks), len(current), len(data))
+            current.extend(data)
+        if current:
+            blocks.append(bytes(current))
+        return index, blocks
+
+    def write_source(self, collection: str, source: str, texts: Dict[str, str], kind: str = "parents") -> None:
+        """
+        Guarda los textos (ID -> texto) de una fuente, reemplazando los anteriores.
+        """
+        path = self._path(collection, source, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        index, blocks = self._blocks(texts)
+        if self.codec == "zstd":
+            import zstandard
+
+            compressor = zstandard.ZstdCompressor(level=self.level)
+            blocks = [compressor.compress(block) for block in blocks]
+        positions, offset = [], 0
+        for block in blocks:
+            positions.append((offset, len(block)))
+            offset += len(block)
+        header = json.dumps({"source": source, "codec": self.codec, "blocks": positions, "index": index}).encode("utf-8")
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(len(header)))
+            f.write(header)
+            for block in blocks:
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def delete_source(self, collection: str, source: str, kind: str = "parents") -> None:
+        path = self._path(collection, source, kind)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def drop_collection(self, collection: str) -> None:
+        shutil.rmtree(os.path.join(self.folder, collection), ignore_errors=True)
+
+    # ------------------------ Lectura ------------------------
+
+    def _segment(self, collection: str, source: str, kind: str = "parents") -> Optional[_Segment]:
+        path = self._path(collection, source, kind)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._segments.get(path)
+            if cached and cached[0] == version:
+                self._segments.move_to_end(path)
+                return cached[1]
+            # Los segmentos reemplazados o expulsados no se cierran aquí (otro
+            # hilo puede estar leyéndolos): el mapeo se libera cuando deja de
+            # haber referencias a ellos
+            segment = _Segment(path)
+            self._segments[path] = (version, segment)
+            self._segments.move_to_end(path)
+            while len(self._segments) > self.max_open_segments:
+                self._segments.popitem(last=False)
+            return segment
+
+    def get(self, collection: str, source: str, ids: Iterable[str], kind: str = "parents") -> Dict[str, str]:
+        """
+        Textos de ``ids`` de una fuente (los que no estén se omiten).
+        """
+        segment = self._segment(collection, source, kind)
+        if segment is None:
+            return {}
+        texts = {}
+        for chunk_id in ids:
+            text = segment.read(chunk_id)
+            if text is not None:
+                texts[chunk_id] = text
+        return texts
+
+    def close(self) -> None:
+        with self._lock:
+            for _, segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+
+
+_default: Optional[DocStore] = None
+_default_lock = threading.Lock()
+
+
+def default_docstore() -> DocStore:
+    """
+    ``DocStore`` de ``DOCSTORE_FOLDER`` compartido por todo el proceso
+    (reutiliza los segmentos ya mapeados en memoria).
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = DocStore()
+        return _default
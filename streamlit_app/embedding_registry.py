@@ -0,0 +1,159 @@
+"""
+Registro de modelos de embedding por colección.
+
+La dimensión de cada modelo se averigua una sola vez preguntando a Ollama
+(un embedding de prueba) y queda en caché en el proceso. Qué modelo y qué
+dimensión usa cada colección se guarda en Qdrant, en la colección interna
+``REGISTRY_COLLECTION`` (un punto sin vectores por colección), de modo que
+la app y el DAG indexan y consultan siempre con el modelo de la colección.
+"""
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Colección interna con el registro (no se muestra en la app)
+REGISTRY_COLLECTION = "_embedding_registry"
+# Modelo para las colecciones nuevas si no se indica otro
+DEFAULT_EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "nomic-embed-text")
+
+_REGISTRY_NAMESPACE = uuid.UUID("0d4f7a3e-2b8c-5e61-9a4d-3c7b1e8f6a25")
+
+_dimensions: Dict[str, int] = {}
+_dimensions_lock = threading.Lock()
+
+
+class EmbeddingModelMismatch(ValueError):
+    """
+    El modelo pedido no es compatible con el de la colección.
+    """
+
+
+def embedding_dimension(model: str) -> int:
+    """
+    Dimensión de los vectores de ``model``; solo la primera llamada consulta a Ollama.
+    """
+    with _dimensions_lock:
+        if model in _dimensions:
+            return _dimensions[model]
+    from langchain_ollama import OllamaEmbeddings
+
+    dimension = len(OllamaEmbeddings(model=model).embed_query("dimension"))
+    logger.info(f"Modelo de embedding {model}: {dimension} dimensiones")
+    with _dimensions_lock:
+        _dimensions[model] = dimension
+    return dimension
+
+
+def is_internal_collection(name: str) -> bool:
+    return name == REGISTRY_COLLECTION
+
+
+def list_collections(client) -> List[str]:
+    """
+    Colecciones de usuario (sin la del registro).
+    """
+    return [c.name for c in client.get_collections().collections if not is_internal_collection(c.name)]
+
+
+def _point_id(collection_name: str) -> str:
+    return str(uuid.uuid5(_REGISTRY_NAMESPACE, collection_name))
+
+
+def register_collection(client, collection_name: str, model: str, dimension: int, granularity: str = "chunk",
+                        payload: str = "full") -> Dict:
+    """
+    Guarda el modelo, la dimensión, la granularidad (ver ``parent_child``) y
+    el modo de payload (ver ``compact_payload``) de ``collection_name``.
+    """
+    from qdrant_client.http.models import PointStruct
+
+    if not client.collection_exists(REGISTRY_COLLECTION):
+        client.create_collection(REGISTRY_COLLECTION, vectors_config={})
+    info = {
+        "collection": collection_name,
+        "model": model,
+        "dimension": dimension,
+        "granularity": granularity,
+        "payload": payload,
+        "registered_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    client.upsert(REGISTRY_COLLECTION, points=[PointStruct(id=_point_id(collection_name), vector={}, payload=info)])
+    return info
+
+
+def unregister_collection(client, collection_name: str) -> None:
+    if client.collection_exists(REGISTRY_COLLECTION):
+        client.delete(REGISTRY_COLLECTION, points_selector=[_point_id(collection_name)])
+
+
+def collection_embedding(client, collection_name: str) -> Optional[Dict]:
+    """
+    ``{"model", "dimension", ...}`` registrados para la colección, o None.
+    """
+    if not client.collection_exists(REGISTRY_COLLECTION):
+        return None
+    points = client.retrieve(REGISTRY_COLLECTION, ids=[_point_id(collection_name)], with_payload=True)
+    return points[0].payload if points else None
+
+
+def collection_dimension(client, collection_name: str) -> int:
+    """
+    Tamaño del vector denso configurado en la colección.
+    """
+    vectors = client.get_collection(collection_name).config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = next(iter(vectors.values()))
+    return vectors.size
+
+
+def create_collection(client, collection_name: str, model: str, sparse_vector_name: Optional[str] = "bm25",
+                      granularity: str = "chunk", payload: str = "full") -> Dict:
+    """
+    Crea la colección con la dimensión de ``model`` y la registra.
+    """
+    from qdrant_client.http.models import Distance, VectorParams
+
+    dimension = embedding_dimension(model)
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
+        sparse_vectors_config={sparse_vector_name: {}} if sparse_vector_name else None,
+    )
+    return register_collection(client, collection_name, model, dimension, granularity, payload)
+
+
+def resolve_collection_model(client, collection_name: str, model: Optional[str] = None,
+                             sparse_vector_name: Optional[str] = "bm25", granularity: str = "chunk",
+                             payload: str = "full") -> Dict:
+    """
+    Devuelve el registro de la colección, creándola si no existe.
+
+    - Colección registrada: se usa siempre su modelo (``model`` se ignora).
+    - Colección sin registrar (creada antes del registro): se registra con
+      ``model`` si su dimensión coincide; si no, ``EmbeddingModelMismatch``.
+    - Colección inexistente: se crea con ``model`` (o el modelo por defecto)
+      con ``granularity`` y ``payload``. Las existentes conservan los suyos.
+    """
+    model = model or DEFAULT_EMBEDDING_MODEL
+    if not client.collection_exists(collection_name):
+        return create_collection(client, collection_name, model, sparse_vector_name, granularity, payload)
+
+    info = collection_embedding(client, collection_name)
+    if info:
+        if info["model"] != model:
+            logger.info(f"La colección {collection_name} usa el modelo {info['model']} (se ignora {model}).")
+        return {"granularity": "chunk", "payload": "full", **info}
+
+    dimension = embedding_dimension(model)
+    existing = collection_dimension(client, collection_name)
+    if existing != dimension:
+        raise EmbeddingModelMismatch(
+            f"La colección '{collection_name}' tiene vectores de {existing} dimensiones y "
+            f"el modelo '{model}' genera {dimension}."
+        )
+    return register_collection(client, collection_name, model, dimension)
@@ -0,0 +1,191 @@
+"""
+Recuperación federada sobre varias colecciones de Qdrant.
+
+La consulta se convierte en embedding una vez por modelo y se lanza en paralelo
+contra todas las colecciones (pool de hilos compartido). Cada colección
+tiene su propio tiempo límite, que empieza a contar cuando su búsqueda
+arranca (no mientras espera un hilo libre): las que no responden a tiempo
+o fallan se descartan y se informan, sin bloquear al resto. Como las
+búsquedas abandonadas siguen ocupando su hilo, la consulta completa tiene
+además un límite de ``timeout + FEDERATED_QUEUE_MARGIN``: las que no han
+conseguido hilo para entonces se cancelan y cuentan como "timeout". Los scores se normalizan
+por colección y los resultados se fusionan con un top-k global (heap).
+"""
+import heapq
+import logging
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# Configuración (variables de entorno)
+FEDERATED_MAX_WORKERS = int(os.environ.get("FEDERATED_MAX_WORKERS", "8"))
+FEDERATED_TIMEOUT = float(os.environ.get("FEDERATED_TIMEOUT", "5"))
+# Margen sobre ``timeout`` para las búsquedas que esperan un hilo libre (segundos)
+FEDERATED_QUEUE_MARGIN = float(os.environ.get("FEDERATED_QUEUE_MARGIN", "1"))
+
+# Métodos de normalización de scores entre colecciones
+NORMALIZATIONS = ("minmax", "zscore", "none")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+@dataclass
+class FederatedHit:
+    collection: str
+    content: str
+    score: float
+    # Score original de Qdrant (antes de normalizar)
+    raw_score: float
+    id: str = ""
+    metadata: Dict = field(default_factory=dict)
+
+
+@dataclass
+class FederatedResult:
+    hits: List[FederatedHit]
+    # Colección -> motivo ("timeout" o el error) de las que no han respondido
+    failed: Dict[str, str] = field(default_factory=dict)
+    # Colección -> segundos de búsqueda
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Pool de hilos compartido por todas las consultas del proceso.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FEDERATED_MAX_WORKERS, thread_name_prefix="federated")
+        return _executor
+
+
+def normalize_scores(scores: Sequence[float], method: str = "minmax") -> List[float]:
+    """
+    Normaliza los scores de una colección para poder compararlos con los de otras.
+
+    - ``minmax``: reescala a [0, 1] (un único resultado, o todos iguales, valen 1).
+    - ``zscore``: resta la media y divide por la desviación típica (0 si no hay dispersión).
+    - ``none``: deja los scores tal cual.
+    """
+    if method not in NORMALIZATIONS:
+        raise ValueError(f"Normalización desconocida: {method!r}")
+    scores = list(scores)
+    if method == "none" or not scores:
+        return scores
+    if method == "minmax":
+        low, high = min(scores), max(scores)
+        if high == low:
+            return [1.0] * len(scores)
+        return [(s - low) / (high - low) for s in scores]
+    stdev = statistics.pstdev(scores)
+    mean = statistics.fmean(scores)
+    return [(s - mean) / stdev if stdev else 0.0 for s in scores]
+
+
+def _search_collection(client, collection_name: str, query_vector: List[float], limit: int, timeout: float,
+                       started: Optional[Dict[str, float]] = None):
+    if started is not None:
+        started[collection_name] = time.monotonic()
+    start = time.perf_counter()
+    points = client.search(
+        collection_name=collection_name,
+        query_vector=query_vector,
+        limit=limit,
+        with_payload=True,
+        with_vectors=False,
+        timeout=max(1, int(timeout)),
+    )
+    return points, time.perf_counter() - start
+
+
+def federated_search(client, collections: Sequence[str], query_vector: Union[List[float], Mapping[str, List[float]]], top_k: int = 5,
+                     timeout: float = FEDERATED_TIMEOUT, normalization: str = "minmax", metrics=None) -> FederatedResult:
+    """
+    Busca ``query_vector`` en todas las ``collections`` a la vez y devuelve
+    el top-k global. Cada búsqueda dispone de ``timeout`` segundos desde que
+    empieza; si hay más colecciones que hilos, las que esperan en cola no
+    consumen su tiempo mientras tanto, pero ninguna espera más allá de
+    ``timeout + FEDERATED_QUEUE_MARGIN`` desde la llamada.
+    ``query_vector`` puede ser un dict colección -> vector si las colecciones
+    usan modelos de embedding distintos.
+    """
+    if normalization not in NORMALIZATIONS:
+        raise ValueError(f"Normalización desconocida: {normalization!r}")
+
+    executor = get_executor()
+    call_deadline = time.monotonic() + timeout + FEDERATED_QUEUE_MARGIN
+    # Colección -> instante (monotonic) en que empezó su búsqueda
+    started: Dict[str, float] = {}
+    futures = {
+        executor.submit(
+            _search_collection,
+            client,
+            name,
+            query_vector[name] if isinstance(query_vector, Mapping) else query_vector,
+            top_k,
+            timeout,
+            started,
+        ): name
+        for name in dict.fromkeys(collections)
+    }
+
+    result = FederatedResult(hits=[])
+    done, pending = set(), set(futures)
+    def deadline(future):
+        name = futures[future]
+        return min(started[name] + timeout, call_deadline) if name in started else call_deadline
+
+    while pending:
+        finished, pending = wait(pending, timeout=max(0.0, min(map(deadline, pending)) - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+        done |= finished
+        now = time.monotonic()
+        for future in [f for f in pending if now >= deadline(f)]:
+            # Las que siguen en cola se cancelan; las que ya han empezado
+            # siguen en su hilo, pero su resultado se ignora
+            future.cancel()
+            pending.discard(future)
+            result.failed[futures[future]] = "timeout"
+
+    candidates = []
+    for future in done:
+        name = futures[future]
+        try:
+            points, seconds = future.result()
+        except Exception as e:
+            logger.warning(f"Búsqueda fallida en la colección {name}: {e}")
+            result.failed[name] = str(e)
+            continue
+        result.seconds[name] = seconds
+        if metrics:
+            metrics.observe("search_seconds", seconds)
+
+        scores = normalize_scores([p.score for p in points], normalization)
+        for point, score in zip(points, scores):
+            payload = point.payload or {}
+            candidates.append(FederatedHit(
+                collection=name,
+                content=payload.get("page_content", ""),
+                score=score,
+                raw_score=point.score,
+                id=str(point.id),
+                metadata=payload.get("metadata", {}),
+            ))
+
+    if metrics:
+        metrics.add("collections_searched", len(result.seconds))
+        metrics.add("collections_failed", len(result.failed))
+    for name, reason in result.failed.items():
+        logger.warning(f"Colección {name} descartada de la búsqueda federada: {reason}")
+
+    # Top-k global; a igual score gana el score original más alto
+    result.hits = heapq.nlargest(top_k, candidates, key=lambda hit: (hit.score, hit.raw_score))
+    return result
@@ -0,0 +1,57 @@
+"""
+Generación de respuestas con los modelos de chat de Ollama.
+"""
+from collections.abc import Iterator
+from typing import Dict, Generator, List
+
+from streamlit_app.warmup import KEEP_ALIVE_SECONDS
+
+def generate_response_with_context(model_name: str, context_docs: List[str], query: str, temp: float = 0.1) -> Iterator[str]:
+    """
+    Genera una respuesta usando un modelo LLM y contexto.
+    Devuelve la respuesta completa como string.
+    """
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.runnables import RunnableSequence
+    from langchain_ollama import OllamaLLM
+
+    llm = OllamaLLM(model=model_name, temperature=temp, keep_alive=KEEP_ALIVE_SECONDS)
+    prompt = PromptTemplate.from_template(
+        """Responde la siguiente pregunta usando el contexto proporcionado. 
+        Si no puedes responder basándote únicamente en el contexto, responde "No sé".
+
+        Contexto:
+        {context}
+
+        Pregunta:
+        {question}
+        """
+    )
+
+    chain: RunnableSequence = (
+        (lambda _: {"context": "\n\n".join(context_docs), "question": query})
+        | prompt
+        | llm
+        | StrOutputParser()
+    )
+
+    full_response = ""
+    for chunk in chain.stream(query):
+        full_response += chunk
+        yield chunk
+
+def ollama_generator(model_name: str, messages: Dict) -> Generator:
+    """
+    Generador que produce la respuesta de Ollama en streaming.
+    """
+    import ollama
+
+    stream = ollama.chat(
+        model=model_name,
+        messages=messages,
+        stream=True,
+        keep_alive=KEEP_ALIVE_SECONDS,
+    )
+    for chunk in stream:
+        yield chunk['message']['content']
@@ -0,0 +1,229 @@
+"""
+Indexación de documentos en Qdrant (chunking semántico, embeddings y upsert).
+
+``index_documents`` no usa Streamlit: la llaman los trabajos de ingesta en
+segundo plano. LangChain, FastEmbed y ``qdrant_client`` se importan al
+indexar, no al importar el módulo.
+"""
+import streamlit as st
+import hashlib
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from streamlit_app.chunk_pipeline import SPARSE_VECTOR_NAME, UPSERT_BATCH_SIZE, split_source, upsert_chunks
+from streamlit_app.compact_payload import PAYLOAD_MODE
+from streamlit_app.connections import check_connection
+from streamlit_app.docstore import DocStore, default_docstore
+from streamlit_app.embedding_registry import resolve_collection_model, unregister_collection
+from streamlit_app.parent_child import INDEX_GRANULARITY
+from streamlit_app.warmup import KEEP_ALIVE_SECONDS
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+# Modos de indexación: "append" añade/reemplaza por fuente, "rebuild" recrea la colección
+INDEX_MODES = ("append", "rebuild")
+
+def source_hash(documents) -> str:
+    """
+    Versión de una fuente: el ``file_hash`` de sus páginas (SHA-256 del
+    fichero, ``compute_file_hash``, igual que en el DAG) o, si las páginas
+    no lo traen, el hash de su texto.
+    """
+    if documents and documents[0].metadata.get("file_hash"):
+        return documents[0].metadata["file_hash"]
+    sha256 = hashlib.sha256()
+    for doc in documents:
+        sha256.update(doc.page_content.encode("utf-8"))
+        sha256.update(b"\0")
+    return sha256.hexdigest()
+
+def qdrant_delete_stale_sources(client: "QdrantClient", collection_name: str, source_hashes: Dict[str, str]):
+    """
+    Elimina los chunks de otras versiones de cada fuente (mismo ``source``,
+    distinto ``file_hash``), igual que el DAG. Los chunks de la versión actual
+    se conservan: sus IDs son deterministas y el upsert los sobrescribe.
+    """
+    from qdrant_client.http.models import FieldCondition, Filter, FilterSelector, MatchValue
+
+    for source, file_hash in source_hashes.items():
+        client.delete(
+            collection_name=collection_name,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[FieldCondition(key="metadata.source", match=MatchValue(value=source))],
+                    must_not=[FieldCondition(key="metadata.file_hash", match=MatchValue(value=file_hash))],
+                )
+            ),
+        )
+
+def qdrant_source_indexed(client: "QdrantClient", collection_name: str, source: str, file_hash: str) -> bool:
+    """
+    True si la colección ya tiene todos los chunks de esa versión de la fuente
+    (una ingesta interrumpida a medias no cuenta como indexada).
+    """
+    from qdrant_client.http.models import FieldCondition, Filter, MatchValue
+
+    source_filter = Filter(
+        must=[
+            FieldCondition(key="metadata.source", match=MatchValue(value=source)),
+            FieldCondition(key="metadata.file_hash", match=MatchValue(value=file_hash)),
+        ]
+    )
+    points, _ = client.scroll(collection_name, scroll_filter=source_filter, limit=1, with_payload=True, with_vectors=False)
+    if not points:
+        return False
+    expected = (points[0].payload or {}).get("metadata", {}).get("source_chunks")
+    return expected is not None and client.count(collection_name, count_filter=source_filter, exact=True).count >= expected
+
+def index_documents(url, embedding_model_name, collection_name, documents, progress: Optional[Callable[..., None]] = None, mode: str = "append",
+                    granularity: str = INDEX_GRANULARITY, payload: str = PAYLOAD_MODE, docstore: Optional[DocStore] = None) -> Dict:
+    """
+    Divide los documentos en chunks semánticos y los indexa en Qdrant.
+    No usa Streamlit, así que puede ejecutarse en segundo plano.
+    Si la colección ya tiene un modelo registrado se usa ese;
+    ``embedding_model_name`` solo decide el de las colecciones nuevas.
+
+    - ``mode="append"``: crea la colección si no existe y reemplaza solo las
+      fuentes (``metadata["source"]``) de ``documents``; los chunks que ya
+      están indexados no se vuelven a calcular.
+    - ``mode="rebuild"``: borra y recrea la colección completa.
+    - ``granularity="parent"`` (solo al crear la colección): indexa chunks
+      hijos pequeños y guarda los chunks semánticos (padres) en ``docstore``.
+    - ``payload="compact"`` (solo al crear la colección): el texto de los
+      chunks se guarda en ``docstore`` y en Qdrant solo los IDs y los campos
+      de filtrado.
+
+    ``progress(etapa, **contadores)`` se llama tras cada paso.
+    Devuelve el informe de métricas de la ingesta.
+    """
+    if mode not in INDEX_MODES:
+        raise ValueError(f"Modo de indexación desconocido: {mode!r}")
+    from langchain_experimental.text_splitter import SemanticChunker
+    from langchain_ollama import OllamaEmbeddings
+    from langchain_qdrant import FastEmbedSparse, QdrantVectorStore, RetrievalMode
+    from qdrant_client import QdrantClient
+
+    from streamlit_app.compact_payload import CompactQdrantVectorStore
+    from streamlit_app.instrumentation import PipelineMetrics, TimedEmbeddings
+
+    def notify(stage, **counts):
+        if progress:
+            progress(stage, **counts)
+
+    metrics = PipelineMetrics("streamlit_ingest", labels={"collection": collection_name, "mode": mode})
+    metrics.add("pages", len(documents))
+    metrics.add("bytes", sum(len(doc.page_content.encode("utf-8")) for doc in documents))
+
+    docstore = docstore or default_docstore()
+    client = QdrantClient(location=url, prefer_grpc=True)
+    exists = client.collection_exists(collection_name)
+    if mode == "rebuild" and exists:
+        client.delete_collection(collection_name)
+        unregister_collection(client, collection_name)
+        docstore.drop_collection(collection_name)
+        exists = False
+    # Crea la colección si hace falta; el modelo y la granularidad son siempre los de la colección
+    model_info = resolve_collection_model(client, collection_name, embedding_model_name, SPARSE_VECTOR_NAME,
+                                          granularity, payload)
+    parent_child = model_info["granularity"] == "parent"
+    compact = model_info["payload"] == "compact"
+    metrics.labels["embedding_model"] = model_info["model"]
+    metrics.labels["granularity"] = model_info["granularity"]
+    metrics.labels["payload"] = model_info["payload"]
+
+    embeddings_model = TimedEmbeddings(
+        OllamaEmbeddings(model=model_info["model"], keep_alive=KEEP_ALIVE_SECONDS),
+        metrics,
+    )
+    text_splitter = SemanticChunker(embeddings_model)
+    notify("chunker", pages=len(documents))
+
+    # Agrupa por fuente: cada una tiene su hash de versión e IDs deterministas
+    by_source: Dict[str, List] = {}
+    for doc in documents:
+        by_source.setdefault(doc.metadata.get("source", ""), []).append(doc)
+    source_hashes = {source: source_hash(docs) for source, docs in by_source.items()}
+
+    if exists:
+        # Las fuentes ya indexadas con la misma versión no se vuelven a trocear
+        for source, file_hash in list(source_hashes.items()):
+            if qdrant_source_indexed(client, collection_name, source, file_hash):
+                metrics.cache_hit("sources")
+                del by_source[source], source_hashes[source]
+            else:
+                metrics.cache_miss("sources")
+
+    chunks, ids = [], []
+    with metrics.stage("semantic_chunking"):
+        for source, docs in by_source.items():
+            source_chunks, source_ids = split_source(text_splitter, docs, source_hashes[source], collection_name,
+                                                     parent_child, docstore)
+            ids.extend(source_ids)
+            chunks.extend(source_chunks)
+    metrics.add("chunks", len(chunks))
+    notify("chunked", pages=len(documents), chunks=len(chunks))
+
+    if not chunks and exists:
+        # Todas las fuentes estaban ya indexadas: no hay nada que subir
+        notify("indexed", pages=len(documents))
+        return metrics.report()
+
+    if exists:
+        with metrics.stage("delete_previous"):
+            qdrant_delete_stale_sources(client, collection_name, source_hashes)
+
+    # Usa el vector disperso que tenga la colección (las creadas por versiones
+    # anteriores pueden llamarlo de otra forma o no tenerlo)
+    sparse_vectors = client.get_collection(collection_name).config.params.sparse_vectors or {}
+    sparse_name = next(iter(sparse_vectors), None)
+    vector_store = (CompactQdrantVectorStore if compact else QdrantVectorStore)(
+        client=client,
+        collection_name=collection_name,
+        embedding=embeddings_model,
+        sparse_embedding=FastEmbedSparse(model_name="Qdrant/bm25") if sparse_name else None,
+        sparse_vector_name=sparse_name or SPARSE_VECTOR_NAME,
+        retrieval_mode=RetrievalMode.HYBRID if sparse_name else RetrievalMode.DENSE,
+    )
+
+    # Con payload compacto el texto va al docstore antes que los puntos a Qdrant
+    upsert_chunks(
+        client, vector_store, collection_name, chunks, ids, metrics,
+        batch_size=UPSERT_BATCH_SIZE,
+        text_docstore=docstore if compact else None,
+        on_batch=lambda vectors: notify("indexing", pages=len(documents), chunks=len(chunks), vectors=vectors),
+    )
+    notify("indexed", pages=len(documents), chunks=len(chunks), vectors=len(chunks))
+
+    return metrics.report()
+
+def qdrant_create_vector_index(url, container_name, embedding_model_name, collection_name, documents, mode: str = "append"):
+    """
+    Indexa documentos en una colección de Qdrant (ver ``index_documents``
+    para los modos "append" y "rebuild").
+    Devuelve el informe de métricas de la ingesta.
+    Lanza excepción si falla.
+    """
+    # verifica si el contenedor de Qdrant está en ejecución
+    status = check_connection(url, container_name)
+
+    # Verifica si hay colecciones existentes
+    if status == True:
+        messages = {
+            "chunker": "1/3 Chunking completado",
+            "chunked": "2/3 División completada",
+            "indexed": "3/3 Índice vectorial creado",
+        }
+
+        def show(stage, **counts):
+            if stage in messages:
+                st.success(messages[stage])
+
+        with st.spinner("Creando índice vectorial", show_time=True):
+            report = index_documents(url, embedding_model_name, collection_name, documents, progress=show, mode=mode)
+
+        st.caption(
+            f"⏱️ {report['elapsed_seconds']:.1f} s · "
+            f"{report['throughput'].get('pages_per_second', 0)} páginas/s · "
+            f"{report['throughput'].get('chunks_per_second', 0)} chunks/s"
+        )
+        return report
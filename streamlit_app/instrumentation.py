@@ -0,0 +1,314 @@
+"""
+Instrumentación ligera del pipeline de ingesta y recuperación.
+
+Registra tramos (spans) por etapa, contadores (páginas, chunks, bytes...),
+latencias de los lotes de embeddings y aciertos de caché. El resultado se
+exporta como informe JSON o en formato de texto OpenMetrics.
+
+No depende de Streamlit ni de Airflow (solo de ``langchain_core``): lo usan tanto el DAG como
+``streamlit_app/indexing.py`` y ``streamlit_app/retrieval.py``.
+"""
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+# Variable de entorno para activar el perfilado: "cprofile" o "pyinstrument"
+PROFILER_ENV = "PIPELINE_PROFILER"
+
+# Contadores que se convierten en rendimiento (unidades por segundo)
+THROUGHPUT_COUNTERS = ("pages", "chunks", "vectors", "bytes")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Percentil ``q`` (0-100) con interpolación lineal. Devuelve 0.0 si no hay datos.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class PipelineMetrics:
+    """
+    Acumula las métricas de una ejecución del pipeline.
+    Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, pipeline: str, run_id: Optional[str] = None, labels: Optional[Dict[str, str]] = None):
+        self.pipeline = pipeline
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.labels = dict(labels or {})
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, List[float]] = {}
+        self.cache: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------ Registro ------------------------
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Mide la duración de una etapa. Si la etapa falla el tramo queda
+        registrado con ``ok=False``.
+        """
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append({
+                    "stage": name,
+                    "start": round(start - self._start, 6),
+                    "seconds": round(end - start, 6),
+                    "ok": ok,
+                })
+
+    def add(self, counter: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def observe(self, histogram: str, value: float) -> None:
+        with self._lock:
+            self.histograms.setdefault(histogram, []).append(value)
+
+    def cache_hit(self, cache: str, count: int = 1) -> None:
+        with self._lock:
+            self.cache.setdefault(cache, {"hits": 0, "misses": 0})["hits"] += count
+
+    def cache_miss(self, cache: str, count: int = 1) -> None:
+        with self._lock:
+            self.cache.setdefault(cache, {"hits": 0, "misses": 0})["misses"] += count
+
+    # ------------------------ Informes ------------------------
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """
+        Tiempo total acumulado por etapa.
+        """
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span["stage"]] = totals.get(span["stage"], 0.0) + span["seconds"]
+        return totals
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def report(self) -> Dict:
+        """
+        Devuelve un informe serializable en JSON con todas las métricas.
+        """
+        with self._lock:
+            elapsed = self.elapsed()
+            throughput = {
+                f"{name}_per_second": round(self.counters[name] / elapsed, 3) if elapsed > 0 else 0.0
+                for name in THROUGHPUT_COUNTERS
+                if name in self.counters
+            }
+            histograms = {
+                name: {
+                    "count": len(values),
+                    "sum": round(sum(values), 6),
+                    "p50": round(percentile(values, 50), 6),
+                    "p95": round(percentile(values, 95), 6),
+                    "p99": round(percentile(values, 99), 6),
+                }
+                for name, values in self.histograms.items()
+            }
+            cache = {
+                name: {
+                    **stats,
+                    "hit_rate": round(stats["hits"] / (stats["hits"] + stats["misses"]), 4)
+                    if stats["hits"] + stats["misses"] else 0.0,
+                }
+                for name, stats in self.cache.items()
+            }
+            return {
+                "pipeline": self.pipeline,
+                "run_id": self.run_id,
+                "labels": self.labels,
+                "started_at": self.started_at.isoformat(),
+                "elapsed_seconds": round(elapsed, 6),
+                "stages": {name: round(secs, 6) for name, secs in self.stage_seconds().items()},
+                "spans": list(self.spans),
+                "counters": dict(self.counters),
+                "throughput": throughput,
+                "histograms": histograms,
+                "cache": cache,
+            }
+
+    def to_openmetrics(self) -> str:
+        """
+        Exporta las métricas en formato de texto OpenMetrics.
+        """
+        report = self.report()
+        labels = {"pipeline": self.pipeline, "run_id": self.run_id, **self.labels}
+
+        def fmt(extra: Optional[Dict[str, str]] = None) -> str:
+            merged = {**labels, **(extra or {})}
+            body = ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in merged.items())
+            return "{" + body + "}"
+
+        lines = [
+            "# TYPE pipeline_stage_seconds gauge",
+            "# UNIT pipeline_stage_seconds seconds",
+        ]
+        for stage, seconds in report["stages"].items():
+            lines.append(f"pipeline_stage_seconds{fmt({'stage': stage})} {seconds}")
+
+        lines.append("# TYPE pipeline_elapsed_seconds gauge")
+        lines.append(f"pipeline_elapsed_seconds{fmt()} {report['elapsed_seconds']}")
+
+        for name, value in report["counters"].items():
+            metric = f"pipeline_{_metric_name(name)}"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}_total{fmt()} {value}")
+
+        for name, value in report["throughput"].items():
+            metric = f"pipeline_{_metric_name(name)}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{fmt()} {value}")
+
+        for name, stats in report["histograms"].items():
+            metric = f"pipeline_{_metric_name(name)}"
+            lines.append(f"# TYPE {metric} summary")
+            for q in ("p50", "p95", "p99"):
+                quantile = str(int(q[1:]) / 100)
+                lines.append(f"{metric}{fmt({'quantile': quantile})} {stats[q]}")
+            lines.append(f"{metric}_count{fmt()} {stats['count']}")
+            lines.append(f"{metric}_sum{fmt()} {stats['sum']}")
+
+        if report["cache"]:
+            lines.append("# TYPE pipeline_cache_requests counter")
+            for cache, stats in report["cache"].items():
+                for result in ("hits", "misses"):
+                    lines.append(
+                        f"pipeline_cache_requests_total{fmt({'cache': cache, 'result': result})} {stats[result]}"
+                    )
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, folder: str) -> Dict[str, str]:
+        """
+        Escribe el informe JSON y el fichero OpenMetrics en ``folder``.
+        Devuelve las rutas generadas.
+        """
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.join(folder, f"{self.pipeline}_{self.run_id}")
+        paths = {"json": base + ".json", "openmetrics": base + ".prom"}
+        with open(paths["json"], "w") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(paths["openmetrics"], "w") as f:
+            f.write(self.to_openmetrics())
+        return paths
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name).lower()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# ----------------------------- EMBEDDINGS -----------------------------
+
+class TimedEmbeddings(Embeddings):
+    """
+    Envoltorio de un modelo de embeddings de LangChain que registra la
+    latencia de cada lote en ``embed_batch_seconds`` (y ``embed_query_seconds``).
+    """
+
+    def __init__(self, embeddings, metrics: PipelineMetrics):
+        self.embeddings = embeddings
+        self.metrics = metrics
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        self.metrics.observe("embed_batch_seconds", time.perf_counter() - start)
+        self.metrics.add("embedded_texts", len(texts))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(text)
+        self.metrics.observe("embed_query_seconds", time.perf_counter() - start)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors = await self.embeddings.aembed_documents(texts)
+        self.metrics.observe("embed_batch_seconds", time.perf_counter() - start)
+        self.metrics.add("embedded_texts", len(texts))
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        vector = await self.embeddings.aembed_query(text)
+        self.metrics.observe("embed_query_seconds", time.perf_counter() - start)
+        return vector
+
+
+# ----------------------------- PERFILADO -----------------------------
+
+@contextmanager
+def profiled(output_folder: str, name: str, profiler: Optional[str] = None):
+    """
+    Perfila el bloque con cProfile o pyinstrument si se ha pedido
+    (argumento ``profiler`` o variable de entorno ``PIPELINE_PROFILER``).
+    Sin perfilador configurado no hace nada.
+    """
+    profiler = (profiler or os.environ.get(PROFILER_ENV, "")).strip().lower()
+    if not profiler:
+        yield None
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+    base = os.path.join(output_folder, name)
+
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+
+        prof = Profiler()
+        prof.start()
+        try:
+            yield base + ".html"
+        finally:
+            prof.stop()
+            with open(base + ".html", "w") as f:
+                f.write(prof.output_html())
+    elif profiler == "cprofile":
+        import cProfile
+
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield base + ".prof"
+        finally:
+            prof.disable()
+            prof.dump_stats(base + ".prof")
+    else:
+        raise ValueError(f"Perfilador desconocido: {profiler!r} (usa 'cprofile' o 'pyinstrument')")
@@ -0,0 +1,180 @@
+"""
+Cola de trabajos de ingesta en segundo plano para la app de Streamlit.
+
+Los PDFs subidos se guardan en disco y se entregan a un pool de hilos del
+proceso de Streamlit; la página solo consulta el progreso (páginas, chunks,
+vectores). Como el gestor vive a nivel de proceso (``st.cache_resource``),
+los trabajos siguen en marcha aunque se recargue el navegador.
+"""
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from streamlit_app.pdf_files import compute_file_hash
+
+# Trabajos de ingesta simultáneos (1 = en serie, evita recrear a la vez la misma colección)
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "1"))
+
+
+@dataclass
+class IngestFile:
+    path: str
+    name: str
+    # True si el fichero es temporal y debe borrarse al terminar
+    owned: bool = True
+
+
+@dataclass
+class IngestJob:
+    id: str
+    collection: str
+    embedding_model: str
+    files: List[IngestFile]
+    status: str = "queued"  # queued | running | done | error
+    stage: str = "En cola"
+    pages: int = 0
+    chunks: int = 0
+    vectors: int = 0
+    error: Optional[str] = None
+    report: Optional[Dict] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    finished_at: Optional[str] = None
+    temp_dir: Optional[str] = None
+
+    @property
+    def progress(self) -> float:
+        """
+        Fracción completada (0-1): la extracción cuenta un 10 %, el resto son vectores.
+        """
+        if self.status == "done":
+            return 1.0
+        if not self.chunks:
+            return 0.1 if self.pages else 0.0
+        return 0.1 + 0.9 * self.vectors / self.chunks
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["files"] = [f.name for f in self.files]
+        data["progress"] = self.progress
+        return data
+
+
+def _default_loader(path: str):
+    from langchain_community.document_loaders import PDFPlumberLoader
+
+    return PDFPlumberLoader(path).load()
+
+
+def _default_indexer(*args, **kwargs):
+    from streamlit_app.indexing import index_documents
+
+    return index_documents(*args, **kwargs)
+
+
+class IngestJobManager:
+    """
+    Ejecuta trabajos de ingesta en un ``ThreadPoolExecutor`` y guarda su estado.
+    """
+
+    STAGES = {
+        "chunker": "Preparando chunker semántico",
+        "chunked": "Chunks calculados",
+        "indexing": "Indexando vectores",
+        "indexed": "Índice actualizado",
+    }
+
+    def __init__(self, qdrant_url: str, max_workers: int = INGEST_WORKERS,
+                 loader: Callable = _default_loader, indexer: Callable = _default_indexer):
+        self.qdrant_url = qdrant_url
+        self.loader = loader
+        self.indexer = indexer
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, files: List[IngestFile], collection: str, embedding_model: str, temp_dir: Optional[str] = None, **options) -> str:
+        """
+        Encola un trabajo y devuelve su ID. ``temp_dir`` se borra al terminar.
+        ``options`` se pasan tal cual al indexador.
+        """
+        job = IngestJob(
+            id=uuid.uuid4().hex[:8],
+            collection=collection,
+            embedding_model=embedding_model,
+            files=list(files),
+            temp_dir=temp_dir,
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, options)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestJob]:
+        """
+        Todos los trabajos, del más reciente al más antiguo.
+        """
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def clear_finished(self) -> None:
+        with self._lock:
+            self._jobs = {k: j for k, j in self._jobs.items() if j.status in ("queued", "running")}
+
+    def _update(self, job: IngestJob, **changes) -> None:
+        with self._lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+
+    def _run(self, job: IngestJob, options: Dict) -> None:
+        self._update(job, status="running", stage="Extrayendo texto")
+        try:
+            documents = []
+            for ingest_file in job.files:
+                docs = self.loader(ingest_file.path)
+                # Misma versión de fuente que el DAG: el hash del fichero
+                file_hash = compute_file_hash(ingest_file.path)
+                for doc in docs:
+                    doc.metadata["source"] = ingest_file.name
+                    doc.metadata["file_hash"] = file_hash
+                documents.extend(docs)
+                self._update(job, pages=len(documents))
+
+            if not documents:
+                raise ValueError("Los ficheros no contienen texto.")
+
+            def progress(stage, pages=0, chunks=0, vectors=0):
+                self._update(job, stage=self.STAGES.get(stage, stage), pages=pages, chunks=chunks, vectors=vectors)
+
+            report = self.indexer(
+                self.qdrant_url,
+                job.embedding_model,
+                job.collection,
+                documents,
+                progress=progress,
+                **options,
+            )
+            self._update(job, status="done", stage="Completado", report=report)
+        except Exception as e:
+            self._update(job, status="error", stage="Error", error=str(e))
+        finally:
+            self._cleanup(job)
+            self._update(job, finished_at=datetime.now().isoformat(timespec="seconds"))
+
+    def _cleanup(self, job: IngestJob) -> None:
+        for ingest_file in job.files:
+            if ingest_file.owned and os.path.exists(ingest_file.path):
+                os.remove(ingest_file.path)
+        if job.temp_dir:
+            shutil.rmtree(job.temp_dir, ignore_errors=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,134 @@
+"""
+OCR de respaldo para páginas sin capa de texto (PDFs escaneados).
+
+Solo se rasterizan y procesan las páginas que PDFPlumber devuelve vacías.
+El trabajo se reparte en un pool de procesos acotado (solo CPU: pypdfium2
+para rasterizar y Tesseract para el OCR) y el texto reconocido se guarda en
+una caché en disco indexada por el hash de la imagen de la página, de modo
+que reingestar el mismo PDF nunca repite el OCR.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuración (variables de entorno)
+OCR_DPI = int(os.environ.get("OCR_DPI", "300"))
+OCR_MAX_WORKERS = int(os.environ.get("OCR_MAX_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+OCR_LANG = os.environ.get("OCR_LANG", "spa+eng")
+# Páginas con menos caracteres visibles que esto se consideran sin texto
+OCR_MIN_CHARS = int(os.environ.get("OCR_MIN_CHARS", "20"))
+
+
+def ocr_available() -> bool:
+    """
+    True si pytesseract y el binario de Tesseract están instalados.
+    """
+    try:
+        import pytesseract  # noqa: F401
+    except ImportError:
+        return False
+    return shutil.which("tesseract") is not None
+
+
+def pages_without_text(docs, min_chars: int = OCR_MIN_CHARS) -> List[int]:
+    """
+    Índices (en ``docs``) de las páginas sin texto útil.
+    """
+    return [i for i, doc in enumerate(docs) if len("".join(doc.page_content.split())) < min_chars]
+
+
+def _cache_path(cache_dir: str, page_hash: str) -> str:
+    return os.path.join(cache_dir, page_hash[:2], f"{page_hash}.txt")
+
+
+def _run_tesseract(image, lang: str) -> str:
+    import pytesseract
+
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+def _ocr_page(args) -> Tuple[int, str, bool]:
+    """
+    Rasteriza una página, busca su texto en la caché y, si no está, le
+    aplica OCR. Devuelve (índice, texto, acierto_de_caché).
+    Se ejecuta en los procesos del pool: debe ser una función de módulo.
+    """
+    index, pdf_path, page_number, dpi, lang, cache_dir = args
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[page_number]
+        image = page.render(scale=dpi / 72).to_pil().convert("L")
+    finally:
+        pdf.close()
+
+    digest = hashlib.sha256()
+    digest.update(f"{image.size}:{dpi}:{lang}:".encode("utf-8"))
+    digest.update(image.tobytes())
+    page_hash = digest.hexdigest()
+
+    path = _cache_path(cache_dir, page_hash)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return index, f.read(), True
+
+    text = _run_tesseract(image, lang)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return index, text, False
+
+
+def ocr_empty_pages(file_path: str, docs, cache_dir: str, dpi: int = OCR_DPI, max_workers: int = OCR_MAX_WORKERS,
+                    lang: str = OCR_LANG, metrics=None) -> int:
+    """
+    Completa con OCR las páginas sin texto de ``docs`` (Documents de
+    PDFPlumberLoader de ``file_path``, una por página). Modifica los
+    documentos en el sitio y devuelve cuántas páginas se han recuperado.
+    Con ``max_workers <= 1`` el OCR se ejecuta en el proceso actual.
+    """
+    empty = pages_without_text(docs)
+    if not empty:
+        return 0
+    if not ocr_available():
+        logger.warning(f"OCR no disponible (pytesseract/tesseract): {len(empty)} páginas de {file_path} quedan sin texto.")
+        return 0
+
+    tasks = [
+        (i, file_path, int(docs[i].metadata.get("page", i)), dpi, lang, cache_dir)
+        for i in empty
+    ]
+    workers = min(max_workers, len(tasks))
+    if workers <= 1:
+        results = [_ocr_page(task) for task in tasks]
+    else:
+        # "spawn" evita heredar hilos y conexiones (p. ej. gRPC) del proceso padre
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(_ocr_page, tasks))
+
+    recovered = 0
+    for index, text, cache_hit in results:
+        if metrics:
+            if cache_hit:
+                metrics.cache_hit("ocr")
+            else:
+                metrics.cache_miss("ocr")
+        if text.strip():
+            docs[index].page_content = text
+            docs[index].metadata["ocr"] = True
+            recovered += 1
+    if metrics:
+        metrics.add("ocr_pages", recovered)
+    logger.info(f"OCR: {recovered}/{len(empty)} páginas recuperadas en {file_path}")
+    return recovered
@@ -1,7 +1,9 @@
 # Utils
-from streamlit_app.utils import ollama_check_model, qdrant_check_db, qdrant_create_db, qdrant_delete_db, ollama_pull_model, ollama_delete_model
+from streamlit_app.connections import ollama_check_model, qdrant_check_db
+from streamlit_app.admin import qdrant_create_db, qdrant_delete_db, ollama_pull_model, ollama_delete_model
 # App and models
 import streamlit as st
+import ollama
 
 # ----------------------------- MAIN -----------------------------
 
@@ -30,12 +32,30 @@ def main():
         # Opción para crear nueva colección
         with st.form("vector_form"):
             db_to_create = st.text_input("Nombre de la nueva colección:")
+            # La dimensión de los vectores se obtiene del propio modelo
+            embedding_model = st.selectbox(
+                "Modelo de embedding de la colección:",
+                [model["model"] for model in ollama.list()["models"]],
+            )
+            # Se fijan al crear la colección (los mismos que en Cargar PDF)
+            granularity = st.radio(
+                "Granularidad:",
+                ["chunk", "parent"],
+                format_func=lambda g: {"chunk": "Chunks semánticos", "parent": "Padre/hijo (fragmentos pequeños)"}[g],
+            )
+            payload = st.radio(
+                "Payload en Qdrant:",
+                ["full", "compact"],
+                format_func=lambda p: {"full": "Completo (texto y metadatos)", "compact": "Compacto (solo IDs y filtros)"}[p],
+            )
             submit_pull = st.form_submit_button("Crear colección")
             if submit_pull and db_to_create:
                 qdrant_create_db(
                     db_name=db_to_create,
-                    embedding_size=st.session_state.embedding_dim,
-                    client=client
+                    embedding_model=embedding_model,
+                    client=client,
+                    granularity=granularity,
+                    payload=payload,
                 )
     else:
         st.error("No se pudo conectar con Qdrant. No se puede crear colección.")
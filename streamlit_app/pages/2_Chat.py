@@ -1,5 +1,6 @@
 # Utils
-from streamlit_app.utils import ollama_check_model, ollama_generator
+from streamlit_app.connections import ollama_check_model, ollama_warmup
+from streamlit_app.generation import ollama_generator
 # App and models
 import streamlit as st
 
@@ -15,6 +16,8 @@ def main():
 
     # Verificar si hay modelos cargados en Ollama
     ollama_check_model("http://ollama:11434", "Ollama")
+    # Precarga el modelo de chat en segundo plano
+    ollama_warmup(chat_model=st.session_state.get("selected_model"))
 
     # Display chat messages from history on app rerun
     for message in st.session_state.chat_messages:
@@ -1,5 +1,8 @@
 # Utils
-from streamlit_app.utils import ollama_check_model, qdrant_check_db, retrieve_with_scores, generate_response_with_context
+from streamlit_app.connections import ollama_check_model, ollama_warmup, qdrant_check_db
+from streamlit_app.retrieval import query_embedding_model, retrieve_federated
+from streamlit_app.generation import generate_response_with_context
+from streamlit_app.embedding_registry import list_collections
 # App and models
 import streamlit as st
 import ollama
@@ -21,20 +24,36 @@ def main():
     # Mostrar parámetros solo si hay modelos disponibles
     st.sidebar.title('Ajustes')
 
-    # Campo para seleccionar el tamaño del embedding
-    embedding_dim = st.sidebar.selectbox(
-        "Tamaño del embedding:",
-        options=[384, 512, 768, 1024, 1536],
-        index=2,  # Por defecto 768
-        key="embedding_dim"
-    )
-
+    # Cada colección se consulta con su modelo registrado;
+    # este solo se usa para colecciones creadas antes del registro
     st.sidebar.selectbox(
-        "Embeddings disponibles:",
+        "Embeddings (colecciones sin registrar):",
         [model["model"] for model in ollama.list()["models"]],
         key="embedding_model"
     )
 
+    # Colecciones en las que buscar (en paralelo)
+    collections = []
+    if client:
+        collections = list_collections(client)
+    st.sidebar.multiselect(
+        "Buscar en colecciones:",
+        collections,
+        default=[st.session_state.selected_db] if st.session_state.get("selected_db") in collections else [],
+        key="search_collections",
+    )
+
+    # Precarga en segundo plano el modelo de chat y los de embeddings de las
+    # colecciones elegidas, para que la primera consulta no espere a Ollama
+    search_collections = st.session_state.search_collections or [st.session_state.get("selected_db")]
+    embedding_models = {
+        query_embedding_model(client, name, st.session_state.embedding_model)
+        for name in search_collections if client and name
+    }
+    ollama_warmup(chat_model=st.session_state.get("selected_model"))
+    for model in embedding_models:
+        ollama_warmup(embedding_model=model)
+
     # Número de respuestas similares a mostrar
     st.sidebar.slider("Número de opciones similares:", min_value=1, max_value=10, value=3, key= "top_k")
     # Temperatura
@@ -56,25 +75,26 @@ def main():
         with st.chat_message("assistant"):
             st.markdown("### 🔍 Documentos similares encontrados:")
 
-            results = retrieve_with_scores(
+            result = retrieve_federated(
                 client=client,
-                collection_name=st.session_state.selected_db,
+                collections=search_collections,
                 query=query,
                 embedding_model=st.session_state.embedding_model,
-                embedding_size=st.session_state.embedding_dim,
                 top_k=st.session_state.top_k,
             )
+            for collection, reason in result.failed.items():
+                st.warning(f"La colección '{collection}' no respondió: {reason}")
 
-            for i, (content, score) in enumerate(results):
-                st.markdown(f"**Opción {i+1}** - Similitud: `{score:.2f}`")
-                st.code(content, language="markdown")
+            for i, hit in enumerate(result.hits):
+                st.markdown(f"**Opción {i+1}** - `{hit.collection}` - Similitud: `{hit.raw_score:.2f}`")
+                st.code(hit.content, language="markdown")
 
             st.markdown("---")
             st.markdown("### 🤖 Generando respuesta...")
 
             response_stream = generate_response_with_context(
                 model_name=st.session_state.selected_model,
-                context_docs=[doc for doc, _ in results],
+                context_docs=[hit.content for hit in result.hits],
                 query=query,
                 temp=st.session_state.temp,
             )
@@ -1,69 +1,167 @@
 # Utils
-from streamlit_app.utils import ollama_check_model, qdrant_check_db, load_pdf, load_pdfs_from_folder, qdrant_create_vector_index
+from streamlit_app.connections import ollama_check_model, qdrant_check_db
+from streamlit_app.pdf_files import save_upload
+from streamlit_app.embedding_registry import collection_embedding
+from streamlit_app.jobs import IngestFile, IngestJobManager
 import os
+import tempfile
 # App and models
 import streamlit as st
+import ollama
+
+QDRANT_URL = "http://qdrant:6333"
+
+@st.cache_resource
+def get_job_manager():
+    """
+    Gestor de trabajos compartido por todas las sesiones del proceso:
+    los trabajos sobreviven a una recarga del navegador.
+    """
+    return IngestJobManager(QDRANT_URL)
+
+@st.fragment(run_every=2)
+def show_jobs(manager: IngestJobManager):
+    """
+    Muestra el progreso de los trabajos; se refresca solo cada 2 segundos.
+    """
+    jobs = manager.jobs()
+    if not jobs:
+        st.caption("No hay trabajos de ingesta.")
+        return
+
+    for job in jobs:
+        icon = {"queued": "⏳", "running": "⚙️", "done": "✅", "error": "❌"}[job.status]
+        with st.container(border=True):
+            st.markdown(f"{icon} **{job.collection}** · {len(job.files)} PDF · `{job.id}` · {job.created_at}")
+            st.progress(job.progress, text=job.stage)
+            col_pages, col_chunks, col_vectors = st.columns(3)
+            col_pages.metric("Páginas", job.pages)
+            col_chunks.metric("Chunks", job.chunks)
+            col_vectors.metric("Vectores", job.vectors)
+            if job.error:
+                st.error(job.error)
+
+    if st.button("Limpiar trabajos terminados"):
+        manager.clear_finished()
+        st.rerun(scope="fragment")
 
 # ----------------------------- MAIN -----------------------------
 
 def main():
-    
+
     st.set_page_config(
         page_title="Cargar PDF",
         page_icon="📁",
     )
     st.title("📁 Cargar PDF")
-    
+
     # Verificar si hay modelos cargados en Ollama
     ollama_check_model("http://ollama:11434", "Ollama")
 
     # Mostrar parámetros solo si hay modelos disponibles
     st.sidebar.title('Ajustes')
-    
-    # Campo para seleccionar el tamaño del embedding
-    embedding_dim = st.sidebar.selectbox(
-        "Tamaño del embedding:",
-        options=[384, 512, 768, 1024, 1536],
-        index=2,  # Por defecto 768
-        key="embedding_dim"
+
+    # Modo de indexación: añadir solo cuesta los embeddings de los documentos nuevos
+    index_mode = st.sidebar.radio(
+        "Modo de indexación:",
+        ["append", "rebuild"],
+        format_func=lambda mode: {
+            "append": "Añadir / actualizar documentos",
+            "rebuild": "Reconstruir colección (borra todo)",
+        }[mode],
     )
 
-    # Opción para subir archivo o carpeta
-    upload_option = st.sidebar.radio("Selecciona fuente de datos:", ["Archivo PDF", "Carpeta con PDFs"])
+    # Opción para subir archivos o carpeta
+    upload_option = st.sidebar.radio("Selecciona fuente de datos:", ["Archivos PDF", "Carpeta con PDFs"])
 
-    doc = None
+    uploaded_files = []
+    folder_files = []
 
-    if upload_option == "Archivo PDF":
-        uploaded_file = st.file_uploader("Sube tu archivo PDF", type="pdf")
-        if uploaded_file is not None:
-            doc = load_pdf(uploaded_file)
-            st.success("Archivo PDF cargado con éxito!")
+    if upload_option == "Archivos PDF":
+        uploaded_files = st.file_uploader("Sube tus archivos PDF", type="pdf", accept_multiple_files=True) or []
 
     elif upload_option == "Carpeta con PDFs":
         folder_path = st.text_input("Ruta local a la carpeta con PDFs")
         if folder_path and os.path.isdir(folder_path):
-            doc = load_pdfs_from_folder(folder_path)
-            st.success(f"Se cargaron {len(doc)} documentos desde la carpeta.")
+            for root, _, files in os.walk(folder_path):
+                for file in files:
+                    if file.lower().endswith(".pdf"):
+                        path = os.path.join(root, file)
+                        folder_files.append(IngestFile(path=path, name=os.path.relpath(path, folder_path), owned=False))
+            st.success(f"Se encontraron {len(folder_files)} PDFs en la carpeta.")
         elif folder_path:
             st.warning("La ruta proporcionada no es válida.")
 
     # Conexión con Qdrant
-    client = qdrant_check_db("http://qdrant:6333", "Qdrant")
+    client = qdrant_check_db(QDRANT_URL, "Qdrant")
+    manager = get_job_manager()
 
-    if st.button("Crear índice vectorial"):
-        if not doc:
-            st.warning("Primero sube un archivo o selecciona una carpeta.")
+    # Las colecciones existentes se indexan siempre con su propio modelo,
+    # granularidad y payload: solo se eligen al crear la colección
+    model_info = None
+    exists = False
+    if client and st.session_state.get("selected_db"):
+        exists = client.collection_exists(st.session_state.selected_db)
+        model_info = collection_embedding(client, st.session_state.selected_db)
+    creating = index_mode == "rebuild" or not exists
+    granularity, payload = "chunk", "full"
+    if model_info and not creating:
+        st.sidebar.caption(
+            f"Modelo de embedding de la colección: `{model_info['model']}` ({model_info['dimension']} dimensiones), "
+            f"granularidad `{model_info.get('granularity', 'chunk')}`, payload `{model_info.get('payload', 'full')}`"
+        )
+        granularity = model_info.get("granularity", "chunk")
+        payload = model_info.get("payload", "full")
+    else:
+        st.sidebar.selectbox(
+            "Modelo de embedding:",
+            [model["model"] for model in ollama.list()["models"]],
+            key="embedding_model",
+        )
+        if creating:
+            # Padre/hijo: se buscan fragmentos pequeños y se devuelve su sección completa
+            granularity = st.sidebar.radio(
+                "Granularidad:",
+                ["chunk", "parent"],
+                format_func=lambda g: {"chunk": "Chunks semánticos", "parent": "Padre/hijo (fragmentos pequeños)"}[g],
+            )
+            # Compacto: el texto se guarda comprimido fuera de Qdrant (menos memoria)
+            payload = st.sidebar.radio(
+                "Payload en Qdrant:",
+                ["full", "compact"],
+                format_func=lambda p: {"full": "Completo (texto y metadatos)", "compact": "Compacto (solo IDs y filtros)"}[p],
+            )
         else:
-            if client:
-                qdrant_create_vector_index(
-                    url="http://qdrant:6333",
-                    container_name="Qdrant",
-                    embedding_model_name=st.session_state.selected_model,
-                    embedding_size=st.session_state.embedding_dim,
-                    collection_name=st.session_state.selected_db,
-                    documents=doc
-                )
-                st.success(f"Índice vectorial '{st.session_state.selected_db}' creado con éxito!")
+            # Colección creada antes del registro: se registra con el modelo elegido
+            st.sidebar.caption(
+                "La colección existente conserva granularidad `chunk` y payload `full`; "
+                "para cambiarlos, reconstrúyela."
+            )
+
+    if st.button("Crear índice vectorial"):
+        if not uploaded_files and not folder_files:
+            st.warning("Primero sube archivos o selecciona una carpeta.")
+        elif client:
+            temp_dir = None
+            files = folder_files
+            if uploaded_files:
+                # Los ficheros se copian a disco por bloques; el trabajo los borra al terminar
+                temp_dir = tempfile.mkdtemp(prefix="upload_")
+                files = [IngestFile(path=save_upload(f, temp_dir), name=f.name) for f in uploaded_files]
+
+            job_id = manager.submit(
+                files,
+                collection=st.session_state.selected_db,
+                embedding_model=model_info["model"] if model_info and not creating else st.session_state.embedding_model,
+                temp_dir=temp_dir,
+                mode=index_mode,
+                granularity=granularity,
+                payload=payload,
+            )
+            st.success(f"Trabajo `{job_id}` en cola: {len(files)} PDF hacia '{st.session_state.selected_db}'.")
+
+    st.subheader("⚙️ Trabajos de ingesta")
+    show_jobs(manager)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
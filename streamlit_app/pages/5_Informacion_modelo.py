@@ -1,5 +1,6 @@
 # Utils
-from streamlit_app.utils import ollama_model_info
+from streamlit_app.connections import get_model_warmup
+from streamlit_app.admin import ollama_model_info
 # App and models
 import streamlit as st
 import ollama
@@ -24,5 +25,22 @@ def main():
         info = ollama_model_info(OLLAMA_URL, st.session_state.selected_model)
         st.json(info)
 
+    # Modelos residentes en memoria (/api/ps)
+    st.subheader("🧠 Modelos cargados en memoria")
+    warmup = get_model_warmup()
+    try:
+        resident = warmup.ps()
+    except Exception as e:
+        st.error(f"No se pudo consultar /api/ps: {e}")
+        resident = []
+    if resident:
+        st.dataframe(resident, hide_index=True)
+        to_unload = st.selectbox("Modelo a descargar de memoria:", [m["model"] for m in resident])
+        if st.button("Descargar de memoria"):
+            warmup.unload(to_unload)
+            st.rerun()
+    else:
+        st.caption("No hay modelos cargados.")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,84 @@
+"""
+Indexación multigranularidad (padre/hijo).
+
+Cada chunk semántico (el "padre", una sección del documento) se divide en
+chunks hijos pequeños. En Qdrant solo se indexan los hijos, que llevan el
+ID de su padre en los metadatos; el texto de los padres se guarda en el
+``DocStore`` local. Al recuperar, los hijos encontrados se sustituyen por
+el texto de su padre (un padre aparece una sola vez, con su mejor score).
+"""
+import os
+from typing import Dict, List, Tuple
+
+from streamlit_app.chunk_ids import chunk_id
+
+# Granularidad de una colección: "chunk" indexa los chunks semánticos tal
+# cual, "parent" indexa hijos pequeños y devuelve el padre como contexto
+GRANULARITIES = ("chunk", "parent")
+INDEX_GRANULARITY = os.environ.get("INDEX_GRANULARITY", "chunk")
+CHILD_CHUNK_SIZE = int(os.environ.get("CHILD_CHUNK_SIZE", "400"))
+CHILD_CHUNK_OVERLAP = int(os.environ.get("CHILD_CHUNK_OVERLAP", "50"))
+# Candidatos extra que se buscan por cada resultado pedido (varios hijos
+# pueden compartir padre)
+PARENT_OVERSAMPLE = int(os.environ.get("PARENT_OVERSAMPLE", "3"))
+
+
+def split_children(parents, parent_ids: List[str], chunk_size: int = CHILD_CHUNK_SIZE,
+                   chunk_overlap: int = CHILD_CHUNK_OVERLAP) -> Tuple[List, List[str]]:
+    """
+    Divide los chunks padre (con IDs de ``assign_chunk_ids``) en hijos.
+    Devuelve (hijos, ids); los IDs de los hijos también son deterministas.
+    """
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    children, ids = [], []
+    for parent, parent_id in zip(parents, parent_ids):
+        for ordinal, text in enumerate(splitter.split_text(parent.page_content) or [parent.page_content]):
+            cid = chunk_id(parent_id, ordinal, text)
+            metadata = dict(parent.metadata, parent_id=parent_id, child_ordinal=ordinal, chunk_id=cid)
+            children.append(Document(page_content=text, metadata=metadata))
+            ids.append(cid)
+    return children, ids
+
+
+def store_parents(docstore, collection: str, parents, parent_ids: List[str]) -> None:
+    """
+    Guarda el texto de los padres en el ``DocStore``, un segmento por fuente.
+    """
+    by_source: Dict[str, Dict[str, str]] = {}
+    for parent, parent_id in zip(parents, parent_ids):
+        by_source.setdefault(parent.metadata.get("source", ""), {})[parent_id] = parent.page_content
+    for source, texts in by_source.items():
+        docstore.write_source(collection, source, texts)
+
+
+def expand_to_parents(hits, docstore) -> List:
+    """
+    Sustituye el texto de los hits hijos (``FederatedHit`` ordenados por
+    score) por el de su padre y elimina los padres repetidos. Los hits sin
+    padre, o cuyo padre no está en el ``DocStore``, se devuelven tal cual.
+    """
+    wanted: Dict[Tuple[str, str], set] = {}
+    for hit in hits:
+        if hit.metadata.get("parent_id"):
+            wanted.setdefault((hit.collection, hit.metadata.get("source", "")), set()).add(hit.metadata["parent_id"])
+    texts = {
+        key: docstore.get(key[0], key[1], parent_ids)
+        for key, parent_ids in wanted.items()
+    }
+
+    expanded, seen = [], set()
+    for hit in hits:
+        parent_id = hit.metadata.get("parent_id")
+        parent_text = texts.get((hit.collection, hit.metadata.get("source", "")), {}).get(parent_id) if parent_id else None
+        if parent_text is None:
+            expanded.append(hit)
+            continue
+        if (hit.collection, parent_id) in seen:
+            continue
+        seen.add((hit.collection, parent_id))
+        hit.content = parent_text
+        expanded.append(hit)
+    return expanded
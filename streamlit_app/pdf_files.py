@@ -0,0 +1,63 @@
+"""
+Ficheros PDF: copia de subidas a disco, hash de versión y carga de documentos.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Tamaño de los bloques al copiar ficheros subidos a disco
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def save_upload(uploaded_file, folder: str) -> str:
+    """
+    Copia un fichero subido a ``folder`` por bloques, sin leerlo entero en
+    memoria de una vez. Devuelve la ruta del fichero creado.
+    """
+    os.makedirs(folder, exist_ok=True)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=folder) as tmp_file:
+        uploaded_file.seek(0)
+        shutil.copyfileobj(uploaded_file, tmp_file, UPLOAD_CHUNK_SIZE)
+        return tmp_file.name
+
+def compute_file_hash(filepath):
+    """
+    SHA-256 del contenido del fichero: identifica la versión de una fuente
+    (``metadata["file_hash"]``) tanto en el DAG como en la app.
+    """
+    sha256 = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        while chunk := f.read(8192):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def load_pdf(uploaded_file):
+    """
+    Carga un PDF subido y devuelve una lista de documentos.
+    Elimina el archivo temporal tras su uso.
+    """
+    from langchain_community.document_loaders import PDFPlumberLoader
+
+    tmp_path = save_upload(uploaded_file, tempfile.gettempdir())
+    try:
+        docs = PDFPlumberLoader(tmp_path).load()
+    finally:
+        os.remove(tmp_path)
+    for doc in docs:
+        doc.metadata["source"] = uploaded_file.name
+    return docs
+
+def load_pdfs_from_folder(folder_path):
+    """
+    Carga todos los PDFs de una carpeta y devuelve una lista de documentos.
+    """
+    from langchain_community.document_loaders import PDFPlumberLoader
+
+    all_documents = []
+    for root, _, files in os.walk(folder_path):
+        for file in files:
+            if file.lower().endswith(".pdf"):
+                file_path = os.path.join(root, file)
+                loader = PDFPlumberLoader(file_path)
+                all_documents.extend(loader.load())
+    return all_documents
@@ -0,0 +1,125 @@
+"""
+Recuperación de documentos de una o varias colecciones de Qdrant.
+
+La consulta se codifica con el modelo registrado de cada colección; los
+hits de colecciones padre/hijo se amplían a su padre y los de colecciones
+con payload compacto cargan su texto del ``DocStore``.
+"""
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from streamlit_app.compact_payload import hydrate_hits
+from streamlit_app.docstore import default_docstore
+from streamlit_app.embedding_registry import collection_embedding
+from streamlit_app.federated import FEDERATED_TIMEOUT, FederatedHit, FederatedResult, federated_search
+from streamlit_app.parent_child import PARENT_OVERSAMPLE, expand_to_parents
+from streamlit_app.warmup import KEEP_ALIVE_SECONDS
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+    from streamlit_app.instrumentation import PipelineMetrics
+
+def query_settings(client: "QdrantClient", collection_name: str, default_model: str) -> Dict:
+    """
+    Modelo, granularidad y modo de payload con los que se indexó la colección
+    (``default_model``, "chunk" y "full" si no está registrada).
+    """
+    info = collection_embedding(client, collection_name) or {}
+    return {
+        "model": info.get("model", default_model),
+        "granularity": info.get("granularity", "chunk"),
+        "payload": info.get("payload", "full"),
+    }
+
+def query_embedding_model(client: "QdrantClient", collection_name: str, default_model: str) -> str:
+    """
+    Modelo con el que se indexó la colección (``default_model`` si no está registrada).
+    """
+    return query_settings(client, collection_name, default_model)["model"]
+
+def retrieve_with_scores(client: "QdrantClient", collection_name: str, query: str, embedding_model: str, embedding_size=None, top_k: int = 5, metrics: Optional["PipelineMetrics"] = None) -> List[Tuple[str, float]]:
+    """
+    Recupera documentos similares de Qdrant y devuelve una lista de tuplas (contenido, score).
+    La consulta se codifica con el modelo registrado de la colección
+    (``embedding_model`` solo para colecciones sin registrar; ``embedding_size``
+    se ignora y se mantiene por compatibilidad).
+    Si se pasa ``metrics`` registra la latencia del embedding y de la búsqueda.
+    """
+    from langchain_ollama import OllamaEmbeddings
+
+    from streamlit_app.instrumentation import TimedEmbeddings
+
+    settings = query_settings(client, collection_name, embedding_model)
+    parent_child = settings["granularity"] == "parent"
+    dense_embeddings = OllamaEmbeddings(model=settings["model"], keep_alive=KEEP_ALIVE_SECONDS)
+    if metrics:
+        dense_embeddings = TimedEmbeddings(dense_embeddings, metrics)
+    query_vector = dense_embeddings.embed_query(query)
+    start = time.perf_counter()
+    search_result = client.search(
+        collection_name=collection_name,
+        query_vector=query_vector,
+        limit=top_k * PARENT_OVERSAMPLE if parent_child else top_k,
+        with_payload=True,
+        with_vectors=False
+    )
+    if metrics:
+        metrics.observe("search_seconds", time.perf_counter() - start)
+    if not parent_child and settings["payload"] == "full":
+        return [(hit.payload.get("page_content", ""), hit.score) for hit in search_result]
+
+    hits = [
+        FederatedHit(
+            collection=collection_name,
+            content=hit.payload.get("page_content", ""),
+            score=hit.score,
+            raw_score=hit.score,
+            id=str(hit.id),
+            metadata=hit.payload.get("metadata", {}),
+        )
+        for hit in search_result
+    ]
+    # Los hijos encontrados se sustituyen por el texto de su padre y el texto
+    # de los chunks con payload compacto se carga solo para los hits finales
+    docstore = default_docstore()
+    if parent_child:
+        hits = expand_to_parents(hits, docstore)[:top_k]
+    return [(hit.content, hit.score) for hit in hydrate_hits(hits, docstore)]
+
+def retrieve_federated(client: "QdrantClient", collections: List[str], query: str, embedding_model: str, top_k: int = 5,
+                       timeout: float = FEDERATED_TIMEOUT, normalization: str = "minmax", metrics: Optional["PipelineMetrics"] = None) -> FederatedResult:
+    """
+    Recupera documentos de varias colecciones en paralelo (ver ``federated_search``).
+    Cada colección se consulta con su modelo registrado (``embedding_model``
+    para las no registradas); la consulta se codifica una vez por modelo.
+    Los hits de colecciones padre/hijo se amplían al texto de su padre y
+    los de colecciones con payload compacto cargan su texto del docstore.
+    """
+    from langchain_ollama import OllamaEmbeddings
+
+    from streamlit_app.instrumentation import TimedEmbeddings
+
+    settings = {name: query_settings(client, name, embedding_model) for name in collections}
+    parent_child = any(s["granularity"] == "parent" for s in settings.values())
+    query_vectors = {}
+    for model in {s["model"] for s in settings.values()}:
+        dense_embeddings = OllamaEmbeddings(model=model, keep_alive=KEEP_ALIVE_SECONDS)
+        if metrics:
+            dense_embeddings = TimedEmbeddings(dense_embeddings, metrics)
+        query_vectors[model] = dense_embeddings.embed_query(query)
+    result = federated_search(
+        client,
+        collections,
+        {name: query_vectors[s["model"]] for name, s in settings.items()},
+        top_k=top_k * PARENT_OVERSAMPLE if parent_child else top_k,
+        timeout=timeout,
+        normalization=normalization,
+        metrics=metrics,
+    )
+    docstore = default_docstore()
+    if parent_child:
+        result.hits = expand_to_parents(result.hits, docstore)[:top_k]
+    if any(s["payload"] == "compact" for s in settings.values()):
+        result.hits = hydrate_hits(result.hits, docstore)
+    return result
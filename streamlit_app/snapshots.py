@@ -0,0 +1,390 @@
+"""
+Snapshots portables de una colección para arrancar entornos nuevos.
+
+Un snapshot es una carpeta con:
+
+- ``points-NNNNN.parquet``: los puntos (ID, vectores densos y dispersos y
+  payload en JSON) en shards Parquet comprimidos con zstd, escritos por
+  lotes de ``scroll`` sin cargar la colección entera en memoria.
+- ``docstore/``: los segmentos del ``DocStore`` de la colección (padres y
+  texto de las colecciones con payload compacto).
+- ``state/``: el estado de la ingesta (p. ej. el registro de ficheros
+  indexados del DAG), para que el DAG no vuelva a procesar esos PDFs. Al
+  importar, los registros JSON se fusionan con el existente.
+- ``manifest.json``: configuración de vectores, registro de la colección
+  (modelo, dimensión, granularidad, payload) y el SHA-256 de cada fichero.
+
+La importación verifica las sumas antes de tocar Qdrant, recrea la
+colección con la configuración del manifiesto y sube los puntos con
+upserts en paralelo. No se llama a Ollama: los vectores ya están en el
+snapshot.
+
+Uso::
+
+    python -m streamlit_app.snapshots export airflow_ingestion /ruta/snapshot
+    python -m streamlit_app.snapshots import /ruta/snapshot --collection otra
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+MANIFEST = "manifest.json"
+# Puntos por lote de scroll/upsert y por shard Parquet
+SNAPSHOT_BATCH_SIZE = int(os.environ.get("SNAPSHOT_BATCH_SIZE", "1024"))
+SNAPSHOT_SHARD_ROWS = int(os.environ.get("SNAPSHOT_SHARD_ROWS", "100000"))
+# Upserts simultáneos al importar
+SNAPSHOT_IMPORT_WORKERS = int(os.environ.get("SNAPSHOT_IMPORT_WORKERS", "4"))
+
+
+class SnapshotError(ValueError):
+    """
+    Snapshot incompleto, corrupto o incompatible con el destino.
+    """
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _dense_column(name: str) -> str:
+    return f"dense.{name}" if name else "dense"
+
+
+def _schema(dense_names: List[str], sparse_names: List[str]):
+    import pyarrow as pa
+
+    fields = [pa.field("id", pa.string())]
+    fields += [pa.field(_dense_column(name), pa.list_(pa.float32())) for name in dense_names]
+    for name in sparse_names:
+        fields.append(pa.field(f"sparse.{name}.indices", pa.list_(pa.uint32())))
+        fields.append(pa.field(f"sparse.{name}.values", pa.list_(pa.float32())))
+    fields.append(pa.field("payload", pa.string()))
+    return pa.schema(fields)
+
+
+def _vector_names(vectors_config) -> List[str]:
+    """
+    Nombres de los vectores densos ("" para el vector sin nombre de LangChain).
+    """
+    return sorted(vectors_config) if isinstance(vectors_config, dict) else [""]
+
+
+# ------------------------ Exportación ------------------------
+
+def _records_to_table(records, dense_names: List[str], sparse_names: List[str], schema):
+    import pyarrow as pa
+
+    columns: Dict[str, list] = {name: [] for name in schema.names}
+    for record in records:
+        vectors = record.vector if isinstance(record.vector, dict) else {"": record.vector}
+        columns["id"].append(str(record.id))
+        for name in dense_names:
+            columns[_dense_column(name)].append(vectors.get(name))
+        for name in sparse_names:
+            sparse = vectors.get(name)
+            columns[f"sparse.{name}.indices"].append(sparse.indices if sparse else None)
+            columns[f"sparse.{name}.values"].append(sparse.values if sparse else None)
+        columns["payload"].append(json.dumps(record.payload or {}, ensure_ascii=False, default=str))
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def export_collection(client, collection_name: str, output_dir: str, docstore=None,
+                      state_files: Optional[Dict[str, str]] = None, batch_size: int = SNAPSHOT_BATCH_SIZE,
+                      shard_rows: int = SNAPSHOT_SHARD_ROWS) -> Dict:
+    """
+    Exporta ``collection_name`` a ``output_dir`` (que no debe existir o estar
+    vacía). ``state_files`` son ficheros de estado a incluir (nombre -> ruta);
+    los que no existen se omiten. Devuelve el manifiesto.
+    """
+    import pyarrow.parquet as pq
+
+    from streamlit_app.embedding_registry import collection_embedding
+
+    if os.path.isdir(output_dir) and os.listdir(output_dir):
+        raise SnapshotError(f"La carpeta de destino no está vacía: {output_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    params = client.get_collection(collection_name).config.params
+    vectors = params.vectors
+    dense_names = _vector_names(vectors)
+    sparse_names = sorted(params.sparse_vectors or {})
+    schema = _schema(dense_names, sparse_names)
+
+    shards, files = [], {}
+    writer, shard_path, shard_count, total = None, None, 0, 0
+
+    def close_shard():
+        nonlocal writer
+        if writer is not None:
+            writer.close()
+            name = os.path.basename(shard_path)
+            shards.append({"file": name, "rows": shard_count})
+            files[name] = file_sha256(shard_path)
+            writer = None
+
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+        )
+        if records:
+            if writer is None or shard_count >= shard_rows:
+                close_shard()
+                shard_path = os.path.join(output_dir, f"points-{len(shards):05d}.parquet")
+                writer = pq.ParquetWriter(shard_path, schema, compression="zstd")
+                shard_count = 0
+            writer.write_table(_records_to_table(records, dense_names, sparse_names, schema))
+            shard_count += len(records)
+            total += len(records)
+        if offset is None:
+            break
+    close_shard()
+
+    # Segmentos del DocStore (ya comprimidos) y estado de la ingesta
+    if docstore is not None:
+        source_folder = os.path.join(docstore.folder, collection_name)
+        for root, _, names in os.walk(source_folder):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                relative = os.path.relpath(os.path.join(root, name), source_folder)
+                target = os.path.join(output_dir, "docstore", relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(os.path.join(root, name), target)
+                files[os.path.join("docstore", relative).replace(os.sep, "/")] = file_sha256(target)
+    for name, path in (state_files or {}).items():
+        if os.path.exists(path):
+            target = os.path.join(output_dir, "state", name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(path, target)
+            files[f"state/{name}"] = file_sha256(target)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "collection": collection_name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "points": total,
+        "vectors": (
+            {name: v.model_dump(mode="json", exclude_none=True) for name, v in vectors.items()}
+            if isinstance(vectors, dict) else vectors.model_dump(mode="json", exclude_none=True)
+        ),
+        "sparse_vectors": {
+            name: v.model_dump(mode="json", exclude_none=True) for name, v in (params.sparse_vectors or {}).items()
+        },
+        "registry": collection_embedding(client, collection_name),
+        "shards": shards,
+        "files": files,
+    }
+    with open(os.path.join(output_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    logger.info(f"Snapshot de {collection_name}: {total} puntos en {len(shards)} shards ({time.perf_counter() - start:.1f} s).")
+    return manifest
+
+
+# ------------------------ Importación ------------------------
+
+def load_manifest(snapshot_dir: str) -> Dict:
+    path = os.path.join(snapshot_dir, MANIFEST)
+    if not os.path.exists(path):
+        raise SnapshotError(f"No hay {MANIFEST} en {snapshot_dir}")
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Formato de snapshot no soportado: {manifest.get('format')}")
+    return manifest
+
+
+def verify_snapshot(snapshot_dir: str) -> Dict:
+    """
+    Comprueba el SHA-256 de todos los ficheros del manifiesto.
+    Devuelve el manifiesto o lanza ``SnapshotError``.
+    """
+    manifest = load_manifest(snapshot_dir)
+    bad = []
+    for name, expected in manifest["files"].items():
+        path = os.path.join(snapshot_dir, name)
+        if not os.path.exists(path) or file_sha256(path) != expected:
+            bad.append(name)
+    if bad:
+        raise SnapshotError(f"Ficheros ausentes o con checksum incorrecto: {', '.join(sorted(bad))}")
+    return manifest
+
+
+def restore_state_file(source: str, path: str) -> None:
+    """
+    Restaura un fichero de estado. Si ambos son diccionarios JSON (como el
+    registro de ficheros indexados) las entradas del snapshot se fusionan
+    con las existentes; en otro caso se reemplaza el fichero.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        with open(source, encoding="utf-8") as f:
+            incoming = json.load(f)
+        with open(path, encoding="utf-8") as f:
+            current = json.load(f)
+    except (OSError, ValueError):
+        shutil.copyfile(source, path)
+        return
+    if not isinstance(incoming, dict) or not isinstance(current, dict):
+        shutil.copyfile(source, path)
+        return
+    current.update(incoming)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _point_id(value: str):
+    return int(value) if value.isdigit() else value
+
+
+def _table_to_points(table, dense_names: List[str], sparse_names: List[str]):
+    from qdrant_client.http.models import PointStruct, SparseVector
+
+    columns = table.to_pydict()
+    points = []
+    for row, point_id in enumerate(columns["id"]):
+        vector = {}
+        for name in dense_names:
+            dense = columns[_dense_column(name)][row]
+            if dense is not None:
+                vector[name] = dense
+        for name in sparse_names:
+            indices = columns[f"sparse.{name}.indices"][row]
+            if indices is not None:
+                vector[name] = SparseVector(indices=indices, values=columns[f"sparse.{name}.values"][row])
+        if list(vector) == [""] and not sparse_names:
+            vector = vector[""]
+        points.append(PointStruct(id=_point_id(point_id), vector=vector, payload=json.loads(columns["payload"][row])))
+    return points
+
+
+def import_snapshot(client, snapshot_dir: str, collection_name: Optional[str] = None, docstore=None,
+                    state_files: Optional[Dict[str, str]] = None, overwrite: bool = False,
+                    workers: int = SNAPSHOT_IMPORT_WORKERS, batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict:
+    """
+    Restaura un snapshot en ``collection_name`` (por defecto la colección
+    original). ``state_files`` indica dónde restaurar cada fichero de estado
+    (nombre -> ruta). Con ``overwrite=True`` reemplaza la colección si ya
+    existe. Devuelve ``{"collection", "points", "seconds"}``.
+    """
+    import pyarrow.parquet as pq
+    from qdrant_client.http.models import SparseVectorParams, VectorParams
+
+    from streamlit_app.embedding_registry import register_collection, unregister_collection
+
+    start = time.perf_counter()
+    manifest = verify_snapshot(snapshot_dir)
+    collection_name = collection_name or manifest["collection"]
+
+    if client.collection_exists(collection_name):
+        if not overwrite:
+            raise SnapshotError(f"La colección '{collection_name}' ya existe.")
+        client.delete_collection(collection_name)
+        unregister_collection(client, collection_name)
+        if docstore is not None:
+            docstore.drop_collection(collection_name)
+
+    vectors = manifest["vectors"]
+    named = "size" not in vectors
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config={name: VectorParams(**v) for name, v in vectors.items()} if named else VectorParams(**vectors),
+        sparse_vectors_config={name: SparseVectorParams(**v) for name, v in manifest["sparse_vectors"].items()} or None,
+    )
+    dense_names = sorted(vectors) if named else [""]
+    sparse_names = sorted(manifest["sparse_vectors"])
+
+    # Lotes leídos en streaming y subidos en paralelo (se limita el número
+    # de lotes en vuelo para no cargar el snapshot entero en memoria)
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot-import") as executor:
+        pending = []
+        for shard in manifest["shards"]:
+            parquet = pq.ParquetFile(os.path.join(snapshot_dir, shard["file"]))
+            for batch in parquet.iter_batches(batch_size=batch_size):
+                points = _table_to_points(batch, dense_names, sparse_names)
+                pending.append(executor.submit(client.upsert, collection_name, points=points, wait=True))
+                total += len(points)
+                if len(pending) >= workers * 2:
+                    pending.pop(0).result()
+        for future in pending:
+            future.result()
+
+    if docstore is not None:
+        prefix = "docstore/"
+        for name in manifest["files"]:
+            if name.startswith(prefix):
+                target = os.path.join(docstore.folder, collection_name, *name[len(prefix):].split("/"))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(os.path.join(snapshot_dir, name), target)
+    for name, path in (state_files or {}).items():
+        source = os.path.join(snapshot_dir, "state", name)
+        if os.path.exists(source):
+            restore_state_file(source, path)
+
+    registry = manifest.get("registry")
+    if registry:
+        register_collection(
+            client, collection_name, registry["model"], registry["dimension"],
+            registry.get("granularity", "chunk"), registry.get("payload", "full"),
+        )
+    if total != manifest["points"]:
+        raise SnapshotError(f"Se importaron {total} puntos y el snapshot tiene {manifest['points']}.")
+    seconds = time.perf_counter() - start
+    logger.info(f"Snapshot importado en {collection_name}: {total} puntos ({seconds:.1f} s).")
+    return {"collection": collection_name, "points": total, "seconds": seconds}
+
+
+# ------------------------ Línea de comandos ------------------------
+
+def main(argv=None) -> None:
+    from qdrant_client import QdrantClient
+
+    from streamlit_app.docstore import DocStore
+
+    parser = argparse.ArgumentParser(description="Exporta o importa snapshots de colecciones de Qdrant.")
+    parser.add_argument("--qdrant", default=os.environ.get("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--docstore", default=None, help="Carpeta del DocStore (por defecto DOCSTORE_FOLDER)")
+    parser.add_argument("--state", action="append", default=[], metavar="NOMBRE=RUTA",
+                        help="Fichero de estado de la ingesta a exportar/restaurar")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("collection")
+    export_parser.add_argument("output")
+    import_parser = commands.add_parser("import")
+    import_parser.add_argument("snapshot")
+    import_parser.add_argument("--collection", default=None)
+    import_parser.add_argument("--overwrite", action="store_true")
+    import_parser.add_argument("--workers", type=int, default=SNAPSHOT_IMPORT_WORKERS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    client = QdrantClient(url=args.qdrant, prefer_grpc=True)
+    docstore = DocStore(args.docstore) if args.docstore else DocStore()
+    state_files = dict(item.split("=", 1) for item in args.state)
+    if args.command == "export":
+        export_collection(client, args.collection, args.output, docstore=docstore, state_files=state_files)
+    else:
+        import_snapshot(client, args.snapshot, args.collection, docstore=docstore, state_files=state_files,
+                        overwrite=args.overwrite, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
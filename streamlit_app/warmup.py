@@ -0,0 +1,205 @@
+"""
+Precarga y permanencia (``keep_alive``) de los modelos de Ollama.
+
+La primera consulta tras un rato de inactividad paga la carga del modelo
+de embeddings y del de chat. ``ModelWarmup`` los precarga en segundo plano
+al abrir una página o al arrancar el DAG, de modo que la carga se solapa
+con el resto del trabajo. Todas las peticiones pasan ``OLLAMA_KEEP_ALIVE``,
+así que los modelos siguen en memoria mientras haya tráfico y Ollama los
+descarga solo cuando deja de haberlo. Si los modelos residentes (según
+``/api/ps``) superan ``OLLAMA_MAX_RESIDENT_MB``, se descargan primero los
+que llevan más tiempo sin usarse, pero solo entre los que ha cargado o
+usado el propio gestor: los de otros procesos (p. ej. el modelo de
+embeddings del DAG en mitad de una ingesta) no se tocan.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuración (variables de entorno)
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "10m")
+# Memoria máxima para modelos residentes (0 = sin límite)
+OLLAMA_MAX_RESIDENT_MB = float(os.environ.get("OLLAMA_MAX_RESIDENT_MB", "0"))
+# No se repite la precarga de un modelo antes de este intervalo (segundos)
+WARMUP_INTERVAL = float(os.environ.get("WARMUP_INTERVAL", "60"))
+
+MB = 1024 * 1024
+# Unidades de las duraciones de Go que acepta Ollama ("1h30m", "500ms"...)
+_UNITS = {"ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 1e-3, "s": 1, "m": 60, "h": 3600}
+_DURATION = re.compile(r"(\d+(?:\.\d*)?|\.\d+)(ns|us|µs|ms|s|m|h)")
+DEFAULT_KEEP_ALIVE_SECONDS = 600
+
+
+def keep_alive_seconds(keep_alive=OLLAMA_KEEP_ALIVE) -> int:
+    """
+    Convierte ``keep_alive`` (duración de Go como "10m" o "1h30m", o
+    segundos) a segundos. Un valor negativo mantiene el modelo cargado
+    indefinidamente. Lanza ``ValueError`` si el valor no es válido.
+    """
+    if isinstance(keep_alive, str):
+        text = keep_alive.strip()
+        sign = -1 if text.startswith("-") else 1
+        body = text.lstrip("+-")
+        try:
+            return sign * int(float(body))
+        except ValueError:
+            pass
+        parts = _DURATION.findall(body)
+        if not body or "".join(number + unit for number, unit in parts) != body:
+            raise ValueError(f"keep_alive no válido: {keep_alive!r}")
+        return sign * int(sum(float(number) * _UNITS[unit] for number, unit in parts))
+    return int(float(keep_alive))
+
+
+def _default_keep_alive() -> int:
+    try:
+        return keep_alive_seconds(OLLAMA_KEEP_ALIVE)
+    except ValueError as e:
+        # Un valor mal escrito no debe impedir cargar las páginas ni el DAG
+        logger.warning(f"{e}; se usan {DEFAULT_KEEP_ALIVE_SECONDS} s.")
+        return DEFAULT_KEEP_ALIVE_SECONDS
+
+
+# Valor que se pasa en todas las peticiones a Ollama
+KEEP_ALIVE_SECONDS = _default_keep_alive()
+
+
+class ModelWarmup:
+    """
+    Gestor de modelos residentes en un servidor Ollama.
+    """
+
+    def __init__(self, host: Optional[str] = None, keep_alive=KEEP_ALIVE_SECONDS,
+                 max_resident_mb: float = OLLAMA_MAX_RESIDENT_MB, interval: float = WARMUP_INTERVAL):
+        import ollama
+
+        self.client = ollama.Client(host=host)
+        self.keep_alive = keep_alive_seconds(keep_alive)
+        self.max_resident_mb = max_resident_mb
+        self.interval = interval
+        # modelo -> "embedding" | "chat"
+        self._kinds: Dict[str, str] = {}
+        # modelo -> último uso / última precarga (time.monotonic)
+        self._last_used: Dict[str, float] = {}
+        self._last_warmup: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------ Precarga ------------------------
+
+    def preload(self, embedding_model: Optional[str] = None, chat_model: Optional[str] = None,
+                wait: bool = False) -> Optional[threading.Thread]:
+        """
+        Precarga los modelos indicados. Por defecto en un hilo en segundo
+        plano (devuelve el hilo); con ``wait=True`` espera a que terminen.
+        Los modelos precargados hace menos de ``interval`` segundos se omiten.
+        """
+        models = [(m, kind) for m, kind in ((embedding_model, "embedding"), (chat_model, "chat")) if m]
+        now = time.monotonic()
+        with self._lock:
+            pending = [(m, kind) for m, kind in models if now - self._last_warmup.get(m, float("-inf")) >= self.interval]
+            for model, kind in pending:
+                self._kinds[model] = kind
+                self._last_warmup[model] = now
+        if not pending:
+            return None
+
+        thread = threading.Thread(target=self._preload, args=(pending,), name="ollama-warmup", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def _preload(self, models) -> None:
+        for model, kind in models:
+            start = time.perf_counter()
+            try:
+                # Una petición sin contenido solo carga el modelo en memoria
+                if kind == "embedding":
+                    self.client.embed(model=model, input=[], keep_alive=self.keep_alive)
+                else:
+                    self.client.generate(model=model, keep_alive=self.keep_alive)
+                self.touch(model)
+                logger.info(f"Modelo {model} precargado en {time.perf_counter() - start:.2f} s (keep_alive={self.keep_alive}).")
+            except Exception as e:
+                with self._lock:
+                    self._last_warmup.pop(model, None)
+                logger.warning(f"No se pudo precargar el modelo {model}: {e}")
+        self.enforce_memory_budget()
+
+    def touch(self, model: str) -> None:
+        """
+        Registra tráfico para ``model`` (orden LRU de descarga).
+        """
+        with self._lock:
+            self._last_used[model] = time.monotonic()
+
+    # ------------------------ Estado y descarga ------------------------
+
+    def ps(self) -> List[Dict]:
+        """
+        Modelos residentes según ``/api/ps`` de Ollama.
+        """
+        models = []
+        for entry in self.client.ps().models:
+            models.append({
+                "model": entry.model,
+                "size_mb": round((entry.size or 0) / MB, 1),
+                "size_vram_mb": round((entry.size_vram or 0) / MB, 1),
+                "expires_at": entry.expires_at.isoformat() if entry.expires_at else None,
+            })
+        return models
+
+    def unload(self, model: str) -> None:
+        """
+        Descarga ``model`` de la memoria de Ollama (``keep_alive=0``).
+        """
+        import ollama
+
+        if self._kinds.get(model) == "embedding":
+            self.client.embed(model=model, input=[], keep_alive=0)
+        else:
+            try:
+                self.client.generate(model=model, keep_alive=0)
+            except ollama.ResponseError:
+                # Modelo de embeddings cargado por otro proceso
+                self.client.embed(model=model, input=[], keep_alive=0)
+        with self._lock:
+            self._last_warmup.pop(model, None)
+        logger.info(f"Modelo {model} descargado de Ollama.")
+
+    def enforce_memory_budget(self) -> List[str]:
+        """
+        Descarga los modelos menos usados mientras la memoria residente supere
+        ``max_resident_mb``. Solo se descargan modelos precargados o usados
+        por este gestor. Devuelve los modelos descargados.
+        """
+        if not self.max_resident_mb:
+            return []
+        try:
+            resident = self.ps()
+        except Exception as e:
+            logger.warning(f"No se pudo consultar /api/ps: {e}")
+            return []
+
+        total = sum(m["size_mb"] for m in resident)
+        with self._lock:
+            managed = [m for m in resident if m["model"] in self._kinds or m["model"] in self._last_used]
+            # Primero los precargados que aún no se han usado
+            managed.sort(key=lambda m: self._last_used.get(m["model"], float("-inf")))
+        unloaded = []
+        for entry in managed:
+            if total <= self.max_resident_mb:
+                break
+            try:
+                self.unload(entry["model"])
+            except Exception as e:
+                logger.warning(f"No se pudo descargar el modelo {entry['model']}: {e}")
+                continue
+            total -= entry["size_mb"]
+            unloaded.append(entry["model"])
+        return unloaded
@@ -0,0 +1,306 @@
+"""
+Sustitutos locales de los servicios externos para los benchmarks.
+
+- ``FakeOllamaServer``: servidor HTTP que implementa la parte de la API de
+  Ollama que usa el proyecto (embed, generate, chat, tags, ps, show) con
+  respuestas deterministas y un modelo de latencia configurable.
+- ``FakeSparseEmbeddings``: sustituto de ``FastEmbedSparse`` que no descarga
+  ningún modelo.
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from langchain_qdrant.sparse_embeddings import SparseEmbeddings, SparseVector
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class LatencyModel:
+    """
+    Latencia simulada (en milisegundos) de las llamadas a Ollama.
+
+    - ``base_ms``: coste fijo por petición.
+    - ``per_item_ms``: coste por texto en un lote de embeddings.
+    - ``per_token_ms``: coste por token generado en generate/chat.
+    - ``jitter_ms``: ruido uniforme, reproducible gracias a ``seed``.
+    - ``load_ms``: carga de un modelo que no está en memoria (arranque en frío).
+    """
+    base_ms: float = 5.0
+    per_item_ms: float = 0.5
+    per_token_ms: float = 2.0
+    jitter_ms: float = 1.0
+    load_ms: float = 0.0
+    seed: int = 42
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def _jitter(self) -> float:
+        with self._lock:
+            return self._rng.uniform(0, self.jitter_ms)
+
+    def request_delay(self, items: int = 0) -> float:
+        return (self.base_ms + self.per_item_ms * items + self._jitter()) / 1000.0
+
+    def token_delay(self) -> float:
+        return self.per_token_ms / 1000.0
+
+    def load_delay(self) -> float:
+        return self.load_ms / 1000.0
+
+
+def deterministic_embedding(text: str, dim: int) -> List[float]:
+    """
+    Embedding determinista por "feature hashing" de las palabras del texto.
+    Textos con palabras en común producen vectores cercanos, lo que basta
+    para que el SemanticChunker encuentre cortes realistas.
+    """
+    vector = [0.0] * dim
+    for token in TOKEN_RE.findall(text.lower()) or [""]:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[index] += sign
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def deterministic_answer(prompt: str, tokens: int) -> List[str]:
+    """
+    Respuesta determinista: repite palabras del prompt en un orden fijado por su hash.
+    """
+    words = TOKEN_RE.findall(prompt) or ["No", "sé"]
+    seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "little")
+    rng = random.Random(seed)
+    return [rng.choice(words) + " " for _ in range(tokens)]
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeOllamaServer"
+
+    def log_message(self, format, *args):  # noqa: A002 - firma de BaseHTTPRequestHandler
+        pass
+
+    # ------------------------ Utilidades HTTP ------------------------
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, lines):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for line in lines:
+            data = (json.dumps(line) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    # ------------------------ Rutas ------------------------
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [self.server.model_entry(name) for name in self.server.models]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [self.server.model_entry(name) for name in sorted(self.server.loaded)]})
+        elif self.path in ("/", "/api/version"):
+            self._send_json({"version": "0.0.0-fake"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        body = self._read_json()
+        model = body.get("model") or body.get("name", "")
+        self.server.record(self.path)
+
+        # keep_alive=0 descarga el modelo, como en Ollama
+        if self.path in ("/api/embed", "/api/generate", "/api/chat") and str(body.get("keep_alive")) in ("0", "0.0", "0s"):
+            self.server.unload(model)
+            self._send_json({"model": model, "response": "", "embeddings": [], "done": True, "done_reason": "unload"})
+            return
+
+        if self.path == "/api/embed":
+            texts = body.get("input", [])
+            if isinstance(texts, str):
+                texts = [texts] if texts else []
+            self.server.load(model)
+            time.sleep(self.server.latency.request_delay(len(texts)))
+            self._send_json({
+                "model": model,
+                "embeddings": [deterministic_embedding(t, self.server.dim) for t in texts],
+            })
+        elif self.path == "/api/embeddings":
+            self.server.load(model)
+            time.sleep(self.server.latency.request_delay(1))
+            self._send_json({"embedding": deterministic_embedding(body.get("prompt", ""), self.server.dim)})
+        elif self.path == "/api/generate":
+            self._generate(model, body.get("prompt", ""), body.get("stream", True), chat=False)
+        elif self.path == "/api/chat":
+            prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            self._generate(model, prompt, body.get("stream", True), chat=True)
+        elif self.path == "/api/show":
+            self._send_json({"modelfile": "", "details": {"family": "fake"}, "model_info": {
+                "fake.embedding_length": self.server.dim,
+            }})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _generate(self, model, prompt, stream, chat):
+        latency = self.server.latency
+        tokens = deterministic_answer(prompt, self.server.answer_tokens) if prompt else []
+        self.server.load(model)
+        # El coste fijo simula la carga del modelo y el procesado del prompt
+        time.sleep(latency.request_delay(len(prompt) // 200))
+
+        def piece(token, done):
+            created = datetime.now(timezone.utc).isoformat()
+            line = {"model": model, "created_at": created, "done": done}
+            if chat:
+                line["message"] = {"role": "assistant", "content": token}
+            else:
+                line["response"] = token
+            if done:
+                line["done_reason"] = "stop"
+                line["eval_count"] = len(tokens)
+            return line
+
+        if not stream:
+            for _ in tokens:
+                time.sleep(latency.token_delay())
+            self._send_json(piece("".join(tokens), True))
+            return
+
+        def lines():
+            for token in tokens:
+                time.sleep(latency.token_delay())
+                yield piece(token, False)
+            yield piece("", True)
+
+        self._send_stream(lines())
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """
+    Servidor Ollama falso. Se usa como contexto::
+
+        with FakeOllamaServer(dim=768) as server:
+            os.environ["OLLAMA_HOST"] = server.url
+    """
+    daemon_threads = True
+
+    def __init__(self, dim: int = 768, latency: LatencyModel = None, models=("nomic-embed-text", "llama3"),
+                 answer_tokens: int = 32, host: str = "127.0.0.1", port: int = 0, model_size: int = 1):
+        super().__init__((host, port), _OllamaHandler)
+        self.dim = dim
+        self.latency = latency or LatencyModel()
+        self.models = list(models)
+        self.answer_tokens = answer_tokens
+        # Bytes que ocupa cada modelo cargado (en /api/ps)
+        self.model_size = model_size
+        self.loaded = set()
+        self.requests = {}
+        self._requests_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path: str) -> None:
+        with self._requests_lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def load(self, model: str) -> None:
+        """
+        Marca el modelo como residente; la primera vez paga ``load_ms``.
+        """
+        with self._requests_lock:
+            cold = model not in self.loaded
+            self.loaded.add(model)
+        if cold:
+            time.sleep(self.latency.load_delay())
+
+    def unload(self, model: str) -> None:
+        with self._requests_lock:
+            self.loaded.discard(model)
+
+    def model_entry(self, name: str) -> dict:
+        return {
+            "name": name,
+            "model": name,
+            "modified_at": "2025-01-01T00:00:00Z",
+            "expires_at": "2099-01-01T00:00:00Z",
+            "size": self.model_size,
+            "size_vram": 0,
+            "digest": hashlib.sha256(name.encode("utf-8")).hexdigest(),
+            "details": {"family": "fake"},
+        }
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeSparseEmbeddings(SparseEmbeddings):
+    """
+    Sustituto determinista de ``FastEmbedSparse``: frecuencia de términos
+    con índices por hash, sin descargar el modelo BM25.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _embed(self, text: str) -> SparseVector:
+        counts = {}
+        for token in TOKEN_RE.findall(text.lower()):
+            index = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+            counts[index] = counts.get(index, 0.0) + 1.0
+        indices = sorted(counts)
+        return SparseVector(indices=indices, values=[counts[i] for i in indices])
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
@@ -0,0 +1,373 @@
+"""
+Suite de benchmarks de ingesta y recuperación sin servicios externos.
+
+Levanta un Ollama falso (``fake_services.FakeOllamaServer``), usa Qdrant en
+modo ``:memory:`` y genera un corpus PDF sintético. Mide:
+
+- Ingesta del DAG: páginas/s, chunks/s, tiempos por etapa y pico de RSS.
+- Funciones RAG: latencias p50/p95/p99 de ``retrieve_with_scores`` y
+  tiempo hasta el primer token (TTFT) de ``generate_response_with_context``.
+
+Uso::
+
+    python test/benchmarks/run_benchmarks.py --profile quick --save-baseline
+    python test/benchmarks/run_benchmarks.py --profile quick --check
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+import types
+from typing import Dict, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, "..", ".."))
+DAG_PATH = os.path.join(REPO_ROOT, "dags", "semantic_pdf_chunking_dag.py")
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from fake_services import FakeOllamaServer, FakeSparseEmbeddings, LatencyModel  # noqa: E402
+from synthetic_pdfs import generate_corpus, query_set  # noqa: E402
+
+EMBEDDING_MODEL = "nomic-embed-text"
+CHAT_MODEL = "llama3"
+EMBEDDING_DIM = 768
+COLLECTION_NAME = "bench_collection"
+
+PROFILES = {
+    "quick": {"documents": 3, "pages_per_document": 3, "queries": 10, "top_k": 3},
+    "standard": {"documents": 20, "pages_per_document": 8, "queries": 50, "top_k": 5},
+}
+
+# Métricas comparadas con la línea base: True si "más alto es mejor"
+TRACKED_METRICS = {
+    "ingest.pages_per_second": True,
+    "ingest.chunks_per_second": True,
+    "ingest.peak_rss_mb": False,
+    "rag.retrieve_ms.p50": False,
+    "rag.retrieve_ms.p95": False,
+    "rag.retrieve_ms.p99": False,
+    "rag.ttft_ms.p50": False,
+    "rag.ttft_ms.p95": False,
+    "rag.generate_ms.p50": False,
+}
+
+
+# ----------------------------- MEDICIÓN -----------------------------
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss está en KB en Linux (pico, no valor actual)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class PeakRssSampler:
+    """
+    Muestrea el RSS del proceso en segundo plano y guarda el pico.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+def summarize_ms(samples) -> Dict[str, float]:
+    from streamlit_app.instrumentation import percentile
+
+    values = [s * 1000.0 for s in samples]
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+    }
+
+
+# ----------------------------- INGESTA -----------------------------
+
+def _airflow_stub() -> Dict[str, types.ModuleType]:
+    """
+    Módulos mínimos de Airflow (``DAG``, ``PythonOperator`` y ``Param``)
+    para importar el fichero del DAG sin tener Airflow instalado.
+    """
+    class DAG:
+        def __init__(self, dag_id, **kwargs):
+            self.dag_id = dag_id
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    class PythonOperator:
+        def __init__(self, task_id, python_callable, **kwargs):
+            self.task_id = task_id
+            self.python_callable = python_callable
+
+        def __rshift__(self, other):
+            return other
+
+    class Param:
+        def __init__(self, default=None, **kwargs):
+            self.value = default
+
+    modules = {name: types.ModuleType(name) for name in (
+        "airflow", "airflow.models", "airflow.models.param", "airflow.operators", "airflow.operators.python",
+    )}
+    modules["airflow"].DAG = DAG
+    modules["airflow.models.param"].Param = Param
+    modules["airflow.operators.python"].PythonOperator = PythonOperator
+    return modules
+
+
+def load_dag_module():
+    """
+    Importa el fichero del DAG. Si Airflow no está instalado se importa con
+    ``_airflow_stub``: las tareas son funciones normales y no lo necesitan.
+    """
+    try:
+        import airflow  # noqa: F401
+        stub = {}
+    except ImportError:
+        stub = _airflow_stub()
+    sys.modules.update(stub)
+    try:
+        spec = importlib.util.spec_from_file_location("semantic_pdf_chunking_dag", DAG_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for name in stub:
+            sys.modules.pop(name, None)
+    return module
+
+
+def bench_dag_ingest(dag, base_folder: str, ollama_url: str, client) -> Dict:
+    """
+    Ejecuta ``process_and_index`` del DAG contra los servicios locales.
+    """
+    dag.BASE_FOLDER = base_folder
+    dag.WATCH_FOLDER = os.path.join(base_folder, "incoming")
+    dag.PROCESSED_FOLDER = os.path.join(base_folder, "processed")
+    dag.INDEX_LOG = os.path.join(base_folder, "indexed_files.json")
+    dag.METRICS_FOLDER = os.path.join(base_folder, "metrics")
+    dag.CHECKPOINT_FOLDER = os.path.join(base_folder, "checkpoints")
+    dag.OLLAMA_URL = ollama_url
+    dag.COLLECTION_NAME = COLLECTION_NAME
+    dag.EMBEDDING_MODEL_NAME = EMBEDDING_MODEL
+    real_check = dag.check_service
+    dag.check_service = lambda url, name: True if name == "Qdrant" else real_check(url, name)
+
+    # El DAG importa qdrant_client y langchain_qdrant dentro de la tarea:
+    # se sustituyen en sus módulos mientras dura la ingesta
+    import langchain_qdrant
+    import qdrant_client
+
+    originals = qdrant_client.QdrantClient, langchain_qdrant.FastEmbedSparse
+    qdrant_client.QdrantClient = lambda *args, **kwargs: client
+    langchain_qdrant.FastEmbedSparse = FakeSparseEmbeddings
+    try:
+        with PeakRssSampler() as rss:
+            report = dag.process_and_index()
+    finally:
+        qdrant_client.QdrantClient, langchain_qdrant.FastEmbedSparse = originals
+    return {"runner": "dag", "peak_rss_mb": round(rss.peak_mb, 1), "report": report}
+
+
+# ----------------------------- RAG -----------------------------
+
+def bench_rag(client, queries, top_k: int) -> Dict:
+    from streamlit_app.utils import generate_response_with_context, retrieve_with_scores
+
+    retrieve, ttft, generate = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        results = retrieve_with_scores(client, COLLECTION_NAME, query, EMBEDDING_MODEL, top_k=top_k)
+        retrieve.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        first = None
+        for _ in generate_response_with_context(CHAT_MODEL, [doc for doc, _ in results], query):
+            if first is None:
+                first = time.perf_counter() - start
+        generate.append(time.perf_counter() - start)
+        ttft.append(first if first is not None else generate[-1])
+
+    return {
+        "queries": len(queries),
+        "retrieve_ms": summarize_ms(retrieve),
+        "ttft_ms": summarize_ms(ttft),
+        "generate_ms": summarize_ms(generate),
+    }
+
+
+# ----------------------------- SUITE -----------------------------
+
+def run_suite(profile: str = "quick", latency: Optional[LatencyModel] = None, workdir: Optional[str] = None) -> Dict:
+    """
+    Ejecuta la suite completa y devuelve los resultados como diccionario.
+    """
+    from qdrant_client import QdrantClient
+
+    settings = PROFILES[profile]
+    latency = latency or LatencyModel()
+    with tempfile.TemporaryDirectory(dir=workdir) as base_folder, \
+            FakeOllamaServer(dim=EMBEDDING_DIM, latency=latency, models=(EMBEDDING_MODEL, CHAT_MODEL)) as server:
+        previous_host = os.environ.get("OLLAMA_HOST")
+        os.environ["OLLAMA_HOST"] = server.url
+        try:
+            generate_corpus(
+                os.path.join(base_folder, "incoming"),
+                documents=settings["documents"],
+                pages_per_document=settings["pages_per_document"],
+            )
+            client = QdrantClient(location=":memory:")
+
+            ingest = bench_dag_ingest(load_dag_module(), base_folder, server.url, client)
+
+            rag = bench_rag(client, query_set(settings["queries"]), settings["top_k"])
+        finally:
+            if previous_host is None:
+                os.environ.pop("OLLAMA_HOST", None)
+            else:
+                os.environ["OLLAMA_HOST"] = previous_host
+
+    report = ingest.pop("report")
+    return {
+        "profile": profile,
+        "settings": settings,
+        "latency_model": {k: getattr(latency, k) for k in ("base_ms", "per_item_ms", "per_token_ms", "jitter_ms", "seed")},
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "ingest": {
+            **ingest,
+            "seconds": report["elapsed_seconds"],
+            "pages": report["counters"].get("pages", 0),
+            "chunks": report["counters"].get("chunks", 0),
+            "pages_per_second": report["throughput"].get("pages_per_second", 0.0),
+            "chunks_per_second": report["throughput"].get("chunks_per_second", 0.0),
+            "stages": report["stages"],
+            "embed_batch_seconds": report["histograms"].get("embed_batch_seconds", {}),
+        },
+        "rag": rag,
+    }
+
+
+# ----------------------------- LÍNEAS BASE -----------------------------
+
+def baseline_path(profile: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{profile}.json")
+
+
+def save_baseline(results: Dict, path: Optional[str] = None) -> str:
+    path = path or baseline_path(results["profile"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_baseline(profile: str, path: Optional[str] = None) -> Optional[Dict]:
+    path = path or baseline_path(profile)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _lookup(results: Dict, dotted: str):
+    value = results
+    for key in dotted.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.25):
+    """
+    Compara los resultados con la línea base. Devuelve la lista de
+    regresiones (métrica, base, actual) que empeoran más de ``tolerance``.
+    """
+    regressions = []
+    for metric, higher_is_better in TRACKED_METRICS.items():
+        current, base = _lookup(results, metric), _lookup(baseline, metric)
+        if not current or not base:
+            continue
+        if higher_is_better:
+            regressed = current < base * (1 - tolerance)
+        else:
+            regressed = current > base * (1 + tolerance)
+        if regressed:
+            regressions.append((metric, base, current))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--baseline", help="Ruta de la línea base (por defecto baselines/<perfil>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--check", action="store_true", help="Falla si hay regresiones respecto a la línea base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Empeoramiento relativo permitido (0.25 = 25%%)")
+    parser.add_argument("--base-ms", type=float, default=LatencyModel.base_ms)
+    parser.add_argument("--per-item-ms", type=float, default=LatencyModel.per_item_ms)
+    parser.add_argument("--per-token-ms", type=float, default=LatencyModel.per_token_ms)
+    parser.add_argument("--output", help="Guarda los resultados en este fichero JSON")
+    args = parser.parse_args(argv)
+
+    latency = LatencyModel(base_ms=args.base_ms, per_item_ms=args.per_item_ms, per_token_ms=args.per_token_ms)
+    results = run_suite(args.profile, latency)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        print(f"Línea base guardada en {save_baseline(results, args.baseline)}")
+    if args.check:
+        baseline = load_baseline(args.profile, args.baseline)
+        if baseline is None:
+            print("No hay línea base con la que comparar.")
+            return 0
+        regressions = compare(results, baseline, args.tolerance)
+        for metric, base, current in regressions:
+            print(f"❌ Regresión en {metric}: {base} -> {current}")
+        if regressions:
+            return 1
+        print("✅ Sin regresiones respecto a la línea base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
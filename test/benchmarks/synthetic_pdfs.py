@@ -0,0 +1,124 @@
+"""
+Generador de corpus PDF sintéticos y deterministas para los benchmarks.
+
+Escribe PDFs mínimos (fuente Helvetica, una línea de texto por operador)
+sin dependencias externas; PDFPlumber los lee como cualquier otro PDF.
+"""
+import os
+import random
+from typing import List
+
+# Vocabulario por "tema": los párrafos de un mismo tema comparten palabras,
+# así el SemanticChunker tiene cortes que detectar.
+TOPICS = {
+    "qdrant": "vector colección punto índice búsqueda similitud payload filtro réplica segmento".split(),
+    "ollama": "modelo embedding generación token contexto prompt memoria carga servidor inferencia".split(),
+    "airflow": "dag tarea operador programación ejecución reintento planificador registro xcom flujo".split(),
+    "pdf": "página texto fuente imagen extracción documento capa tabla fila columna".split(),
+    "finanzas": "presupuesto gasto ingreso factura balance auditoría trimestre cuenta pago coste".split(),
+}
+COMMON = "el la de que en y los las para con por una un se del como más sobre".split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _to_latin1(text: str) -> str:
+    # Helvetica con WinAnsiEncoding: los caracteres fuera de latin-1 se sustituyen
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def synthetic_paragraph(rng: random.Random, topic: str, words: int = 60, sentence_words: int = 10) -> str:
+    """
+    Párrafo de ``words`` palabras del tema, partido en frases de ``sentence_words``.
+    """
+    vocab = TOPICS[topic]
+    tokens = [rng.choice(vocab) if rng.random() < 0.6 else rng.choice(COMMON) for _ in range(words)]
+    sentences = [" ".join(tokens[i:i + sentence_words]) for i in range(0, len(tokens), sentence_words)]
+    return ". ".join(s.capitalize() for s in sentences) + "."
+
+
+def write_pdf(path: str, pages: List[List[str]]) -> int:
+    """
+    Escribe un PDF con una lista de páginas (cada página, una lista de líneas).
+    Devuelve el tamaño del fichero en bytes.
+    """
+    objects = []
+    page_ids = []
+    # 1: catálogo, 2: árbol de páginas, 3: fuente; el resto, páginas y contenidos
+    next_id = 4
+    for lines in pages:
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        page_ids.append(page_id)
+        stream_lines = ["BT", "/F1 10 Tf", "14 TL", "50 790 Td"]
+        for line in lines:
+            stream_lines.append(f"({_escape(_to_latin1(line))}) Tj T*")
+        stream_lines.append("ET")
+        stream = "\n".join(stream_lines).encode("latin-1")
+        objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1")))
+        objects.append((content_id, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"))
+
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"),
+    ] + objects
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + body + b"\nendobj\n"
+
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n" % (len(objects) + 1)
+    out += b"0000000000 65535 f \n"
+    for obj_id in range(1, len(objects) + 1):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return len(out)
+
+
+def generate_corpus(folder: str, documents: int = 5, pages_per_document: int = 4,
+                    paragraphs_per_page: int = 3, seed: int = 1234) -> List[str]:
+    """
+    Genera ``documents`` PDFs en ``folder``. El mismo ``seed`` produce
+    exactamente los mismos ficheros. Devuelve las rutas creadas.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    paths = []
+    for doc_no in range(documents):
+        pages = []
+        for _ in range(pages_per_document):
+            lines = []
+            for _ in range(paragraphs_per_page):
+                paragraph = synthetic_paragraph(rng, rng.choice(topics))
+                words = paragraph.split()
+                # ~12 palabras por línea para que quepan en la página
+                lines.extend(" ".join(words[i:i + 12]) for i in range(0, len(words), 12))
+                lines.append("")
+            pages.append(lines)
+        path = os.path.join(folder, f"synthetic_{seed}_{doc_no:04d}.pdf")
+        write_pdf(path, pages)
+        paths.append(path)
+    return paths
+
+
+def query_set(count: int = 20, seed: int = 99) -> List[str]:
+    """
+    Consultas deterministas sobre el vocabulario del corpus.
+    """
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    return [synthetic_paragraph(rng, rng.choice(topics), words=8) for _ in range(count)]
@@ -0,0 +1,20 @@
+from run_benchmarks import compare, run_suite
+from synthetic_pdfs import generate_corpus
+
+def test_synthetic_corpus_is_deterministic(tmp_path):
+    first = generate_corpus(str(tmp_path / "a"), documents=2, pages_per_document=2)
+    second = generate_corpus(str(tmp_path / "b"), documents=2, pages_per_document=2)
+    assert [open(p, "rb").read() for p in first] == [open(p, "rb").read() for p in second]
+
+def test_compare_flags_only_regressions():
+    baseline = {"ingest": {"pages_per_second": 10.0}, "rag": {"retrieve_ms": {"p50": 100.0}}}
+    current = {"ingest": {"pages_per_second": 9.0}, "rag": {"retrieve_ms": {"p50": 200.0}}}
+    assert compare(current, baseline, tolerance=0.25) == [("rag.retrieve_ms.p50", 100.0, 200.0)]
+
+def test_quick_profile_runs_the_dag():
+    results = run_suite("quick")
+    assert results["ingest"]["runner"] == "dag"
+    assert results["ingest"]["pages"] > 0
+    assert results["ingest"]["chunks"] > 0
+    assert results["rag"]["retrieve_ms"]["p50"] > 0
+    assert results["rag"]["ttft_ms"]["p50"] <= results["rag"]["generate_ms"]["p50"]
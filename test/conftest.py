@@ -3,4 +3,20 @@ from qdrant_client import QdrantClient
 
 @pytest.fixture(scope="session")
 def qdrant_client():
-    return QdrantClient(url="http://qdrant:6333")
\ No newline at end of file
+    return QdrantClient(url="http://qdrant:6333")
+@pytest.fixture
+def memory_qdrant(monkeypatch):
+    """
+    Qdrant en memoria y embeddings deterministas (modelo "fake", 8
+    dimensiones) en lugar de los servicios reales al indexar.
+    """
+    import langchain_ollama
+    import qdrant_client
+    import streamlit_app.embedding_registry as embedding_registry
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(qdrant_client, "QdrantClient", lambda *args, **kwargs: client)
+    monkeypatch.setattr(langchain_ollama, "OllamaEmbeddings", lambda model, **kwargs: DeterministicFakeEmbedding(size=8))
+    monkeypatch.setitem(embedding_registry._dimensions, "fake", 8)
+    return client
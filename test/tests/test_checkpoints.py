@@ -0,0 +1,40 @@
+from streamlit_app.checkpoints import CheckpointStore
+from streamlit_app.chunk_ids import assign_chunk_ids, chunk_id
+from langchain_core.documents import Document
+
+FILE_HASH = "abc123"
+
+def make_chunks():
+    return [Document(page_content=f"chunk {i}", metadata={"source": "doc.pdf"}) for i in range(3)]
+
+def test_chunk_ids_are_deterministic():
+    first = assign_chunk_ids(make_chunks(), FILE_HASH)
+    second = assign_chunk_ids(make_chunks(), FILE_HASH)
+    assert first == second
+    assert len(set(first)) == 3
+    assert chunk_id(FILE_HASH, 0, "chunk 0") == first[0]
+    assert chunk_id("otro_hash", 0, "chunk 0") != first[0]
+    assert chunk_id(FILE_HASH, 0, "otro contenido") != first[0]
+
+def test_checkpoint_roundtrip_and_progress(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    assert store.load(FILE_HASH) is None
+
+    chunks = make_chunks()
+    ids = assign_chunk_ids(chunks, FILE_HASH)
+    state = store.save_chunks(FILE_HASH, "doc.pdf", chunks, ids)
+    store.mark_upserted(state, 2)
+
+    reloaded = store.load(FILE_HASH)
+    assert reloaded["upserted"] == 2
+    assert reloaded["stage"] == "chunked"
+    docs, loaded_ids = store.load_chunks(FILE_HASH)
+    assert loaded_ids == ids
+    assert [d.page_content for d in docs] == [c.page_content for c in chunks]
+    assert docs[0].metadata["chunk_id"] == ids[0]
+
+    store.mark_upserted(reloaded, 3)
+    assert store.load(FILE_HASH)["stage"] == "upserted"
+
+    store.clear(FILE_HASH)
+    assert store.load(FILE_HASH) is None
@@ -0,0 +1,40 @@
+from streamlit_app.compact_payload import PAYLOAD_FIELDS, hydrate_hits, store_texts
+from streamlit_app.docstore import DocStore
+from streamlit_app.federated import FederatedHit
+from langchain_core.documents import Document
+
+def test_hydrate_fills_only_empty_hits(tmp_path):
+    store = DocStore(str(tmp_path))
+    chunks = [Document(page_content=f"Texto {i}", metadata={"source": "a.pdf"}) for i in range(3)]
+    store_texts(store, "docs", chunks, ["c0", "c1", "c2"])
+
+    hits = [
+        FederatedHit("docs", "", 0.9, 0.9, id="c2", metadata={"source": "a.pdf", "chunk_id": "c2"}),
+        FederatedHit("full", "Ya tiene texto", 0.8, 0.8, id="x", metadata={"source": "b.pdf"}),
+        FederatedHit("docs", "", 0.7, 0.7, id="c0", metadata={"source": "a.pdf"}),
+    ]
+    assert [h.content for h in hydrate_hits(hits, store)] == ["Texto 2", "Ya tiene texto", "Texto 0"]
+
+def test_index_and_retrieve_with_compact_payload(monkeypatch, tmp_path, memory_qdrant):
+    import streamlit_app.embedding_registry as embedding_registry
+    import streamlit_app.indexing as indexing
+    import streamlit_app.retrieval as retrieval
+
+    client = memory_qdrant
+    store = DocStore(str(tmp_path))
+    monkeypatch.setattr(retrieval, "default_docstore", lambda: store)
+    monkeypatch.setattr(indexing, "SPARSE_VECTOR_NAME", None)
+
+    pages = [
+        Document(page_content="Primera frase del documento. Segunda frase.",
+                 metadata={"source": "a.pdf", "page": 0, "producer": "pdfplumber", "total_pages": 1}),
+    ]
+    indexing.index_documents("mem", "fake", "docs", pages, payload="compact", docstore=store)
+    assert embedding_registry.collection_embedding(client, "docs")["payload"] == "compact"
+
+    points, _ = client.scroll("docs", limit=100, with_payload=True)
+    assert points and all("page_content" not in p.payload for p in points)
+    assert all(set(p.payload["metadata"]) <= set(PAYLOAD_FIELDS) for p in points)
+
+    results = retrieval.retrieve_with_scores(client, "docs", "Primera frase", "fake", top_k=1)
+    assert results[0][0].startswith("Primera frase")
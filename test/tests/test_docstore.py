@@ -0,0 +1,47 @@
+from streamlit_app.docstore import DocStore
+import gc
+import os
+
+def test_write_read_and_replace_source(tmp_path):
+    store = DocStore(str(tmp_path))
+    store.write_source("docs", "a.pdf", {"p1": "Sección uno", "p2": "Sección dos ñ"})
+    assert store.get("docs", "a.pdf", ["p2", "p1", "zz"]) == {"p2": "Sección dos ñ", "p1": "Sección uno"}
+
+    # Reindexar la fuente reemplaza su segmento completo
+    store.write_source("docs", "a.pdf", {"p3": "Nueva versión"})
+    assert store.get("docs", "a.pdf", ["p1", "p3"]) == {"p3": "Nueva versión"}
+    assert store.get("docs", "b.pdf", ["p3"]) == {}
+
+    store.drop_collection("docs")
+    assert store.get("docs", "a.pdf", ["p3"]) == {}
+
+
+def test_compressed_blocks_and_kinds(tmp_path):
+    store = DocStore(str(tmp_path), codec="zstd", block_size=64)
+    texts = {f"c{i}": f"Texto repetido del chunk {i} " * 4 for i in range(20)}
+    store.write_source("docs", "a.pdf", texts, kind="text")
+
+    segment = store._segment("docs", "a.pdf", kind="text")
+    assert segment.codec == "zstd" and len(segment.blocks) > 1
+    assert store.get("docs", "a.pdf", ["c19", "c0"], kind="text") == {"c19": texts["c19"], "c0": texts["c0"]}
+    # Los textos de otro tipo no se mezclan con los padres
+    assert store.get("docs", "a.pdf", ["c0"]) == {}
+
+    store.delete_source("docs", "a.pdf", kind="text")
+    assert store.get("docs", "a.pdf", ["c0"], kind="text") == {}
+
+
+def test_open_segments_are_bounded(tmp_path):
+    store = DocStore(str(tmp_path), max_open_segments=8)
+    fds = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    for i in range(100):
+        store.write_source("docs", f"{i}.pdf", {"c": f"Texto {i}"})
+        assert store.get("docs", f"{i}.pdf", ["c"]) == {"c": f"Texto {i}"}
+    # Reescribir una fuente libera el segmento anterior
+    for i in range(30):
+        store.write_source("docs", "0.pdf", {"c": f"Versión {i}"})
+        assert store.get("docs", "0.pdf", ["c"]) == {"c": f"Versión {i}"}
+    assert len(store._segments) == 8
+    gc.collect()
+    if fds is not None:
+        assert len(os.listdir("/proc/self/fd")) - fds <= 8
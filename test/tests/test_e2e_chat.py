@@ -7,6 +7,10 @@ EMBEDDING_SIZE = 768
 
 def test_full_chat_pipeline():
     class MockClient:
+        def collection_exists(self, collection_name):
+            # Sin registro de modelos: se usa MODEL_NAME
+            return False
+
         def search(self, *args, **kwargs):
             return [type("Hit", (), {"payload": {"page_content": "contenido"}, "score": 0.9})]
 
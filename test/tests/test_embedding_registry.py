@@ -0,0 +1,29 @@
+from streamlit_app import embedding_registry as registry
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+import pytest
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(registry._dimensions, "small-embed", 8)
+    monkeypatch.setitem(registry._dimensions, "big-embed", 16)
+    return QdrantClient(location=":memory:")
+
+def test_new_collection_is_created_and_registered(client):
+    info = registry.resolve_collection_model(client, "docs", "small-embed")
+    assert (info["model"], info["dimension"]) == ("small-embed", 8)
+    assert registry.collection_dimension(client, "docs") == 8
+    assert registry.list_collections(client) == ["docs"]
+
+    # Una colección registrada se usa siempre con su propio modelo
+    assert registry.resolve_collection_model(client, "docs", "big-embed")["model"] == "small-embed"
+
+    registry.unregister_collection(client, "docs")
+    assert registry.collection_embedding(client, "docs") is None
+
+def test_unregistered_collection_is_checked_against_model(client):
+    client.create_collection("legacy", vectors_config=VectorParams(size=16, distance=Distance.COSINE))
+    with pytest.raises(registry.EmbeddingModelMismatch):
+        registry.resolve_collection_model(client, "legacy", "small-embed")
+    assert registry.resolve_collection_model(client, "legacy", "big-embed")["dimension"] == 16
+    assert registry.collection_embedding(client, "legacy")["model"] == "big-embed"
@@ -0,0 +1,77 @@
+import streamlit_app.federated as federated
+from streamlit_app.federated import federated_search, normalize_scores
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+import time
+
+class SlowClient:
+    """
+    Cliente falso: cada colección tarda ``delays[nombre]`` segundos y
+    devuelve ``scores[nombre]``.
+    """
+    def __init__(self, delays, scores):
+        self.delays = delays
+        self.scores = scores
+
+    def search(self, collection_name, query_vector, limit, **kwargs):
+        time.sleep(self.delays[collection_name])
+        if self.scores[collection_name] is None:
+            raise RuntimeError("colección rota")
+        return [
+            SimpleNamespace(id=f"{collection_name}-{i}", score=s, payload={"page_content": f"{collection_name} {i}", "metadata": {}})
+            for i, s in enumerate(self.scores[collection_name][:limit])
+        ]
+
+def test_normalize_scores():
+    assert normalize_scores([0.2, 0.6, 0.4]) == pytest.approx([0.0, 1.0, 0.5])
+    # Un único resultado es comparable con los del resto de colecciones
+    assert normalize_scores([0.8]) == [1.0]
+    assert normalize_scores([0.8], "zscore") == [0.0]
+    assert normalize_scores([]) == []
+    assert normalize_scores([0.3, 0.3], "none") == [0.3, 0.3]
+    assert sum(normalize_scores([1.0, 2.0, 3.0], "zscore")) == pytest.approx(0.0)
+
+def test_federated_search_runs_in_parallel_and_skips_slow_collections():
+    names = [f"dep{i}" for i in range(5)]
+    client = SlowClient(
+        delays={**{n: 0.3 for n in names}, "lenta": 3.0, "rota": 0.0},
+        scores={**{n: [0.9 - i / 10, 0.5] for i, n in enumerate(names)}, "lenta": [1.0], "rota": None},
+    )
+
+    start = time.perf_counter()
+    result = federated_search(client, names + ["lenta", "rota"], [0.0], top_k=3, timeout=1.0, normalization="none")
+    elapsed = time.perf_counter() - start
+
+    # 5 búsquedas de 0,3 s en paralelo, la lenta se corta en el timeout
+    assert elapsed < 1.5
+    assert result.failed == {"lenta": "timeout", "rota": "colección rota"}
+    assert sorted(result.seconds) == names
+    assert [hit.collection for hit in result.hits] == ["dep0", "dep1", "dep2"]
+    assert [hit.score for hit in result.hits] == sorted((hit.score for hit in result.hits), reverse=True)
+
+def test_timeout_starts_when_the_search_starts(monkeypatch):
+    # Más colecciones que hilos: las que esperan en cola no agotan su tiempo
+    monkeypatch.setattr(federated, "_executor", ThreadPoolExecutor(max_workers=2))
+    names = [f"dep{i}" for i in range(4)]
+    client = SlowClient(delays={n: 0.3 for n in names}, scores={n: [0.5] for n in names})
+
+    result = federated_search(client, names, [0.0], top_k=4, timeout=0.5)
+    assert result.failed == {}
+    assert sorted(result.seconds) == names
+
+def test_queued_searches_have_an_overall_deadline(monkeypatch):
+    # Las búsquedas abandonadas siguen ocupando los hilos del pool compartido
+    monkeypatch.setattr(federated, "_executor", ThreadPoolExecutor(max_workers=2))
+    monkeypatch.setattr(federated, "FEDERATED_QUEUE_MARGIN", 0.2)
+    client = SlowClient(delays={"lenta1": 2.0, "lenta2": 2.0, "rapida": 0.0},
+                        scores={"lenta1": [0.5], "lenta2": [0.5], "rapida": [0.5]})
+
+    result = federated_search(client, ["lenta1", "lenta2"], [0.0], timeout=0.3)
+    assert result.failed == {"lenta1": "timeout", "lenta2": "timeout"}
+
+    # El pool está saturado: la siguiente consulta no espera un hilo sin límite
+    start = time.perf_counter()
+    result = federated_search(client, ["rapida"], [0.0], timeout=0.3)
+    assert time.perf_counter() - start < 1.0
+    assert result.failed == {"rapida": "timeout"}
@@ -0,0 +1,84 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DAGS_FOLDER = os.environ.get("DAGS_FOLDER") or os.path.join(REPO_ROOT, "dags")
+# Presupuesto por módulo, medido en un intérprete nuevo (importación en frío)
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", "1.0"))
+HEAVY_MODULES = (
+    "fastembed", "langchain_community", "langchain_experimental", "langchain_ollama",
+    "langchain_qdrant", "ollama", "pyarrow", "qdrant_client",
+)
+
+MEASURE = """
+import importlib.util, json, sys, time
+target = sys.argv[1]
+start = time.perf_counter()
+if target.endswith(".py"):
+    spec = importlib.util.spec_from_file_location("page", target)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else:
+    importlib.import_module(target)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(m.split(".")[0] for m in sys.modules)}))
+"""
+
+def measure(target: str, runs: int = 2):
+    """
+    Mejor tiempo de ``runs`` importaciones en frío y módulos cargados.
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE, target], cwd=REPO_ROOT, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return min(r["seconds"] for r in results), set(results[0]["modules"])
+
+@pytest.mark.parametrize("target, allowed", [
+    ("streamlit_app.utils", ()),
+    ("streamlit_app.connections", ()),
+    ("streamlit_app.generation", ()),
+    ("streamlit_app.retrieval", ()),
+    ("streamlit_app.indexing", ()),
+    ("streamlit_app.admin", ()),
+    ("streamlit_app.jobs", ()),
+    ("streamlit_app.snapshots", ()),
+    ("streamlit_app.chunk_pipeline", ()),
+    # La página de chat solo necesita ollama al generar
+    ("streamlit_app/pages/2_Chat.py", ()),
+    ("streamlit_app/pages/3_RAG.py", ("ollama",)),
+    ("streamlit_app/pages/4_Cargar_PDF.py", ("ollama",)),
+])
+def test_import_time_budget(target, allowed):
+    seconds, modules = measure(target)
+    assert not (modules & set(HEAVY_MODULES)) - set(allowed)
+    assert seconds < IMPORT_TIME_BUDGET, f"{target}: {seconds:.3f} s"
+
+@pytest.mark.parametrize("dag_file", ["semantic_pdf_chunking_dag.py", "collection_snapshot_dag.py"])
+def test_dag_top_level_imports_are_light(dag_file):
+    path = os.path.join(DAGS_FOLDER, dag_file)
+    if not os.path.exists(path):
+        pytest.skip(f"No se encuentra {path}")
+    # El scheduler ejecuta el nivel superior del fichero en cada parseo
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imported = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imported.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imported.add(node.module.split(".")[0])
+            if node.module.startswith("streamlit_app."):
+                imported.add(node.module)
+    assert not imported & set(HEAVY_MODULES)
+    light = {m for m in imported if m.startswith("streamlit_app.")}
+    for module in light:
+        _, modules = measure(module, runs=1)
+        assert not modules & set(HEAVY_MODULES), module
@@ -0,0 +1,58 @@
+from streamlit_app.instrumentation import PipelineMetrics, TimedEmbeddings, percentile
+import json
+import pytest
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([5.0], 99) == 5.0
+
+def test_report_contains_stages_throughput_and_cache():
+    metrics = PipelineMetrics("test", run_id="run1")
+    with metrics.stage("extraction"):
+        metrics.add("pages", 10)
+    metrics.cache_hit("index_log", 3)
+    metrics.cache_miss("index_log")
+    for value in (0.1, 0.2, 0.3):
+        metrics.observe("embed_batch_seconds", value)
+
+    report = metrics.report()
+    assert "extraction" in report["stages"]
+    assert report["counters"]["pages"] == 10
+    assert "pages_per_second" in report["throughput"]
+    assert report["cache"]["index_log"]["hit_rate"] == 0.75
+    assert report["histograms"]["embed_batch_seconds"]["p50"] == pytest.approx(0.2)
+    json.dumps(report)
+
+def test_failed_stage_is_recorded():
+    metrics = PipelineMetrics("test")
+    with pytest.raises(ValueError):
+        with metrics.stage("upsert"):
+            raise ValueError("boom")
+    assert metrics.spans[0]["ok"] is False
+
+def test_openmetrics_export_and_write(tmp_path):
+    metrics = PipelineMetrics("test", run_id="run1")
+    with metrics.stage("chunking"):
+        metrics.add("chunks", 4)
+    text = metrics.to_openmetrics()
+    assert 'pipeline_stage_seconds{pipeline="test",run_id="run1",stage="chunking"}' in text
+    assert "pipeline_chunks_total" in text
+    assert text.endswith("# EOF\n")
+
+    paths = metrics.write(str(tmp_path))
+    assert json.loads(open(paths["json"]).read())["run_id"] == "run1"
+
+def test_timed_embeddings_records_batch_latency():
+    class FakeEmbeddings:
+        def embed_documents(self, texts):
+            return [[0.0] for _ in texts]
+        def embed_query(self, text):
+            return [0.0]
+
+    metrics = PipelineMetrics("test")
+    embeddings = TimedEmbeddings(FakeEmbeddings(), metrics)
+    embeddings.embed_documents(["a", "b"])
+    embeddings.embed_query("a")
+    assert len(metrics.histograms["embed_batch_seconds"]) == 1
+    assert metrics.counters["embedded_texts"] == 2
@@ -0,0 +1,55 @@
+from streamlit_app.jobs import IngestFile, IngestJobManager
+from langchain_core.documents import Document
+import hashlib
+
+def fake_loader(path):
+    return [Document(page_content=f"texto de {path}", metadata={})]
+
+def fake_indexer(url, embedding_model, collection, documents, progress=None, **options):
+    progress("chunked", pages=len(documents), chunks=4)
+    progress("indexed", pages=len(documents), chunks=4, vectors=4)
+    return {"options": options, "sources": [d.metadata["source"] for d in documents],
+            "hashes": {d.metadata["file_hash"] for d in documents}}
+
+def test_job_runs_in_background_and_cleans_up(tmp_path):
+    temp_dir = tmp_path / "upload"
+    temp_dir.mkdir()
+    owned = temp_dir / "a.pdf"
+    owned.write_bytes(b"pdf")
+    external = tmp_path / "b.pdf"
+    external.write_bytes(b"pdf")
+
+    manager = IngestJobManager("http://qdrant", loader=fake_loader, indexer=fake_indexer)
+    job_id = manager.submit(
+        [IngestFile(str(owned), "a.pdf"), IngestFile(str(external), "b.pdf", owned=False)],
+        collection="docs",
+        embedding_model="nomic-embed-text",
+        temp_dir=str(temp_dir),
+        mode="append",
+    )
+    manager.shutdown()
+
+    job = manager.get(job_id)
+    assert job.status == "done"
+    assert (job.pages, job.chunks, job.vectors) == (2, 4, 4)
+    assert job.progress == 1.0
+    # La versión de cada fuente es el hash del fichero, como en el DAG
+    assert job.report == {"options": {"mode": "append"}, "sources": ["a.pdf", "b.pdf"],
+                          "hashes": {hashlib.sha256(b"pdf").hexdigest()}}
+    assert not temp_dir.exists()
+    assert external.exists()
+
+def test_job_error_is_reported(tmp_path):
+    def failing_indexer(*args, **kwargs):
+        raise RuntimeError("Qdrant caído")
+
+    pdf = tmp_path / "x.pdf"
+    pdf.write_bytes(b"pdf")
+    manager = IngestJobManager("http://qdrant", loader=fake_loader, indexer=failing_indexer)
+    job_id = manager.submit([IngestFile(str(pdf), "x.pdf", owned=False)], "docs", "nomic-embed-text")
+    manager.shutdown()
+
+    job = manager.get(job_id)
+    assert job.status == "error"
+    assert "Qdrant caído" in job.error
+    assert job.finished_at
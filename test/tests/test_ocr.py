@@ -0,0 +1,40 @@
+from streamlit_app import ocr
+from langchain_core.documents import Document
+
+# PDF de una página sin texto: solo un rectángulo negro, como un escaneo
+BLANK_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+    b"2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n"
+    b"3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] /Contents 4 0 R >>\nendobj\n"
+    b"4 0 obj\n<< /Length 20 >>\nstream\n50 50 100 100 re f\nendstream\nendobj\n"
+    b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+)
+
+def make_docs():
+    return [
+        Document(page_content="   ", metadata={"page": 0}),
+        Document(page_content="Esta página ya tiene una capa de texto suficiente.", metadata={"page": 0}),
+    ]
+
+def test_pages_without_text():
+    assert ocr.pages_without_text(make_docs()) == [0]
+
+def test_ocr_fills_empty_pages_and_caches_by_page_hash(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "escaneado.pdf"
+    pdf_path.write_bytes(BLANK_PDF)
+    calls = []
+    monkeypatch.setattr(ocr, "ocr_available", lambda: True)
+    monkeypatch.setattr(ocr, "_run_tesseract", lambda image, lang: calls.append(lang) or "Texto reconocido por OCR")
+
+    docs = make_docs()
+    recovered = ocr.ocr_empty_pages(str(pdf_path), docs, cache_dir=str(tmp_path / "cache"), dpi=72, max_workers=1)
+    assert recovered == 1
+    assert docs[0].page_content == "Texto reconocido por OCR"
+    assert docs[0].metadata["ocr"] is True
+    assert len(calls) == 1
+
+    docs = make_docs()
+    ocr.ocr_empty_pages(str(pdf_path), docs, cache_dir=str(tmp_path / "cache"), dpi=72, max_workers=1)
+    assert docs[0].page_content == "Texto reconocido por OCR"
+    assert len(calls) == 1
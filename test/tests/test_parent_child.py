@@ -0,0 +1,38 @@
+from streamlit_app.chunk_ids import assign_chunk_ids
+from streamlit_app.docstore import DocStore
+from streamlit_app.federated import FederatedHit
+from streamlit_app.parent_child import expand_to_parents, split_children, store_parents
+from langchain_core.documents import Document
+
+def make_parents():
+    parents = [
+        Document(page_content=" ".join(f"Frase {i} de la sección {n}." for i in range(20)), metadata={"source": "a.pdf"})
+        for n in range(2)
+    ]
+    return parents, assign_chunk_ids(parents, "hash-a")
+
+def test_split_children_is_deterministic():
+    parents, parent_ids = make_parents()
+    children, ids = split_children(parents, parent_ids, chunk_size=100, chunk_overlap=0)
+    again, again_ids = split_children(*make_parents(), chunk_size=100, chunk_overlap=0)
+    assert len(children) > len(parents)
+    assert ids == again_ids and len(set(ids)) == len(ids)
+    assert {c.metadata["parent_id"] for c in children} == set(parent_ids)
+    assert all(len(c.page_content) <= 100 for c in children)
+
+def test_hits_are_expanded_to_unique_parents(tmp_path):
+    store = DocStore(str(tmp_path))
+    parents, parent_ids = make_parents()
+    store_parents(store, "docs", parents, parent_ids)
+    children, ids = split_children(parents, parent_ids, chunk_size=100, chunk_overlap=0)
+
+    def hit(child, score):
+        return FederatedHit("docs", child.page_content, score, score, metadata=child.metadata)
+
+    first, second = [c for c in children if c.metadata["parent_id"] == parent_ids[0]][:2]
+    other = next(c for c in children if c.metadata["parent_id"] == parent_ids[1])
+    orphan = FederatedHit("docs", "sin padre", 0.1, 0.1, metadata={"source": "a.pdf"})
+
+    expanded = expand_to_parents([hit(first, 0.9), hit(second, 0.8), hit(other, 0.7), orphan], store)
+    assert [h.content for h in expanded] == [parents[0].page_content, parents[1].page_content, "sin padre"]
+    assert [h.score for h in expanded] == [0.9, 0.7, 0.1]
@@ -0,0 +1,73 @@
+from streamlit_app.docstore import DocStore
+from streamlit_app.embedding_registry import collection_embedding, register_collection
+from streamlit_app.snapshots import SnapshotError, export_collection, import_snapshot
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, SparseVector, SparseVectorParams, VectorParams
+import json
+import os
+import pytest
+
+def make_collection(client, store, points=25):
+    client.create_collection(
+        "docs",
+        vectors_config=VectorParams(size=4, distance=Distance.COSINE),
+        sparse_vectors_config={"bm25": SparseVectorParams()},
+    )
+    client.upsert("docs", points=[
+        PointStruct(
+            id=f"00000000-0000-0000-0000-{i:012d}",
+            vector={"": [1.0, i, 0.5, 2.0], "bm25": SparseVector(indices=[i], values=[0.5])},
+            payload={"page_content": f"Chunk {i}", "metadata": {"source": "a.pdf", "chunk_ordinal": i}},
+        )
+        for i in range(points)
+    ])
+    register_collection(client, "docs", "fake", 4, payload="compact")
+    store.write_source("docs", "a.pdf", {"c0": "Texto"}, kind="text")
+
+def test_export_import_roundtrip(tmp_path):
+    client = QdrantClient(location=":memory:")
+    store = DocStore(str(tmp_path / "docstore"))
+    make_collection(client, store)
+    state = tmp_path / "indexed_files.json"
+    state.write_text('{"a.pdf": {"hash": "h"}}')
+
+    manifest = export_collection(client, "docs", str(tmp_path / "snap"), docstore=store,
+                                 state_files={"indexed_files.json": str(state)}, batch_size=10, shard_rows=10)
+    assert manifest["points"] == 25 and len(manifest["shards"]) == 3
+
+    target = QdrantClient(location=":memory:")
+    target_store = DocStore(str(tmp_path / "restored"))
+    restored_state = tmp_path / "restored_state.json"
+    restored_state.write_text('{"b.pdf": {"hash": "local"}, "a.pdf": {"hash": "viejo"}}')
+    # Qdrant en modo local no admite escrituras concurrentes: un solo worker
+    result = import_snapshot(target, str(tmp_path / "snap"), "copia", docstore=target_store,
+                             state_files={"indexed_files.json": str(restored_state)}, workers=1, batch_size=7)
+    assert result["points"] == 25
+
+    original = client.retrieve("docs", ids=["00000000-0000-0000-0000-000000000007"], with_vectors=True)[0]
+    copy = target.retrieve("copia", ids=["00000000-0000-0000-0000-000000000007"], with_vectors=True)[0]
+    assert copy.payload == original.payload
+    assert copy.vector[""] == pytest.approx(original.vector[""])
+    assert copy.vector["bm25"] == original.vector["bm25"]
+    assert collection_embedding(target, "copia")["payload"] == "compact"
+    assert target_store.get("copia", "a.pdf", ["c0"], kind="text") == {"c0": "Texto"}
+    # El registro del snapshot se fusiona con el existente
+    assert json.loads(restored_state.read_text()) == {"a.pdf": {"hash": "h"}, "b.pdf": {"hash": "local"}}
+
+def test_import_rejects_corrupted_snapshot(tmp_path):
+    client = QdrantClient(location=":memory:")
+    make_collection(client, DocStore(str(tmp_path / "docstore")))
+    export_collection(client, "docs", str(tmp_path / "snap"))
+
+    with open(tmp_path / "snap" / "points-00000.parquet", "ab") as f:
+        f.write(b"corrupto")
+    target = QdrantClient(location=":memory:")
+    with pytest.raises(SnapshotError, match="checksum"):
+        import_snapshot(target, str(tmp_path / "snap"))
+    assert not target.collection_exists("docs")
+
+    # Una colección existente solo se reemplaza con overwrite
+    with pytest.raises(SnapshotError, match="ya existe"):
+        export_collection(client, "docs", str(tmp_path / "snap2"))
+        import_snapshot(client, str(tmp_path / "snap2"))
+    assert os.path.exists(tmp_path / "snap2" / "manifest.json")
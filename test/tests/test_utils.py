@@ -7,3 +7,47 @@ def test_check_connection_success(monkeypatch):
         status_code = 200
     monkeypatch.setattr(requests, "get", lambda *args, **kwargs: MockResponse())
     assert check_connection("http://mock-url", "mock") == True
+
+def test_index_documents_append_replaces_only_changed_sources(monkeypatch, tmp_path, memory_qdrant):
+    import langchain_qdrant
+    import streamlit_app.indexing as indexing
+    from streamlit_app.docstore import DocStore
+    from langchain_core.documents import Document
+    from qdrant_client.http.models import Distance, VectorParams
+
+    client = memory_qdrant
+    store = DocStore(str(tmp_path))
+    from langchain_qdrant import SparseEmbeddings, SparseVector
+
+    class FakeSparse(SparseEmbeddings):
+        def embed_documents(self, texts):
+            return [SparseVector(indices=[len(t) % 97], values=[1.0]) for t in texts]
+
+        def embed_query(self, text):
+            return self.embed_documents([text])[0]
+
+    monkeypatch.setattr(langchain_qdrant, "FastEmbedSparse", lambda model_name: FakeSparse())
+
+    def pages(source, text):
+        return [Document(page_content=f"{text}. Segunda frase de {source}.", metadata={"source": source})]
+
+    def sources():
+        points, _ = client.scroll("docs", limit=100, with_payload=True)
+        return sorted(p.payload["metadata"]["source"] for p in points)
+
+    # Colección antigua sin vector disperso: el modo append la respeta
+    client.create_collection("docs", vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+    indexing.index_documents("mem", "fake", "docs", pages("a.pdf", "Uno") + pages("b.pdf", "Dos"), docstore=store)
+    assert sources() == ["a.pdf", "b.pdf"]
+
+    report = indexing.index_documents("mem", "fake", "docs", pages("b.pdf", "Dos"), docstore=store)
+    assert report["counters"]["chunks"] == 0
+    assert report["cache"]["sources"]["hits"] == 1
+
+    indexing.index_documents("mem", "fake", "docs", pages("b.pdf", "Dos cambiado") + pages("c.pdf", "Tres"), docstore=store)
+    assert sources() == ["a.pdf", "b.pdf", "c.pdf"]
+    points, _ = client.scroll("docs", limit=100, with_payload=True)
+    assert [p.payload["page_content"] for p in points if p.payload["metadata"]["source"] == "b.pdf"][0].startswith("Dos cambiado")
+
+    indexing.index_documents("mem", "fake", "docs", pages("c.pdf", "Tres"), mode="rebuild", docstore=store)
+    assert sources() == ["c.pdf"]
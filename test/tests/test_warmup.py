@@ -0,0 +1,37 @@
+from streamlit_app.warmup import ModelWarmup, keep_alive_seconds
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from fake_services import FakeOllamaServer, LatencyModel
+
+def test_keep_alive_seconds():
+    assert keep_alive_seconds("10m") == 600
+    assert keep_alive_seconds("1h") == 3600
+    assert keep_alive_seconds("45") == 45
+    assert keep_alive_seconds(-1) == -1
+    # Duraciones compuestas de Go
+    assert keep_alive_seconds("1h30m") == 5400
+    assert keep_alive_seconds("1.5h") == 5400
+    assert keep_alive_seconds("2m30s") == 150
+    assert keep_alive_seconds("-1m") == -60
+    with pytest.raises(ValueError):
+        keep_alive_seconds("10 minutos")
+
+def test_preload_and_memory_budget():
+    with FakeOllamaServer(latency=LatencyModel(load_ms=50), models=("embed", "chat", "old"), model_size=1024 * 1024 * 1024) as server:
+        server.loaded.add("old")
+        warmup = ModelWarmup(host=server.url, keep_alive="5m", max_resident_mb=2048)
+
+        warmup.preload(embedding_model="embed", chat_model="chat", wait=True)
+        # Solo caben dos modelos: "old" es de otro proceso y no se toca,
+        # así que se descarga el propio que lleva más tiempo sin usarse
+        assert server.loaded == {"chat", "old"}
+        assert {m["model"] for m in warmup.ps()} == {"chat", "old"}
+
+        # No repite la precarga dentro del intervalo
+        assert warmup.preload(chat_model="chat") is None
+
+        warmup.unload("chat")
+        assert server.loaded == {"old"}